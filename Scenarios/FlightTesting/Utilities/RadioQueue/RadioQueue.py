@@ -10,7 +10,7 @@ import sys
 import os
 import argparse
 import json
-from collections import deque
+from collections import deque, namedtuple
 import threading
 import time
 import math
@@ -20,6 +20,18 @@ import signal
 import random
 import logging
 import csv
+import atexit
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from scenario_timeline import Timeline, load_rate_timeline, load_alloc_timeline
+from radio_report import RadioReportWriter, RadioHistoryWriter
+from input_watcher import InputFileWatcher
+from running_stats import RunningStats
+from epoch_scheduler import EpochScheduler
+try:
+    from class_queues import ClassQueues, update_class_queues
+except ImportError:                 # DSCP class queues need NumPy
+    ClassQueues = update_class_queues = None
 
 # next_timer = 0
 epoch_ms = 100                      # epoch size in milliseconds
@@ -27,31 +39,71 @@ epoch_sec = epoch_ms / 1000         # epoch size converted to seconds
 epochs_per_sec = 1000 / epoch_ms    # number of epochs per second
 epoch_num = 0
 
-lm_eff_eff_vals_q = deque()
+HISTORY_SIZE = 100                  # Number of epochs shown in the LM Effective Efficiency history graph
+lm_eff_eff_vals_q = deque(maxlen=HISTORY_SIZE)
 
 MAX_BW = 10000000                   # max bandwidth of RF channel in bits per second
 MAX_BW_MBPS = MAX_BW / 1000000      # max bandwidth of RF channel in Megabits per second
 
-MAX_QUEUE_SIZE_BYTES = 4194240      # TmNS Radio queues not expected to be larger than 4.2 MB (per DSCP Queue?).
+MAX_QUEUE_SIZE_BYTES = 4194240      # TmNS Radio queues not expected to be larger than 4.2 MB (per DSCP class queue,
+                                    # for radios with class queues: see class_queues.py).
 enforce_max_q_size = False         # Should the simulation enforce the MAX_QUEUE_SIZE_BYTES as a hard limit?
 debug = 0                           # Debug value: initially 0, e.g. no debug
 
 radio_list = []                     # List of Radio objects
-system_vals_array = []              # Array for holding last 'N' system values for sliding average
-AVG_WINDOW_SIZE = 100
+radio_index = {}                    # Radio name -> Radio object (same Radios as radio_list, which keeps display order)
+engine = None                       # Vectorized (NumPy) epoch engine, if enabled.  Radios are then RadioViews into it.
+batch_mode = False                  # Batch mode: simulate as fast as possible from scenario timelines
+scenario_rates = None               # Scenario replay (-S): Timeline of the data input rates, instead of the -i file
+scenario_allocs = None              # Timeline of the bandwidth allocations (--bw-timeline), instead of the -b file
+scenario_loop = False               # Repeat the scenario timelines from the start when they end (--loop)
+scenario_period = 0                 # Length of the scenario in seconds, when looping
+AVG_WINDOW_SIZE = 100               # Number of epochs in the sliding averages (-W)
+system_value_stats = RunningStats(AVG_WINDOW_SIZE)      # Sliding-window statistics of the system value
+lm_eff_eff_stats = RunningStats(AVG_WINDOW_SIZE, hist_bins=400, hist_min=0.0, hist_max=200.0)
+track_latency = False               # Track the queueing delay (sojourn time) of the bytes each radio sends (--latency)
+radio_latency = {}                  # Radio name -> RadioLatency, when track_latency is set
+SOJOURN_PCTS = (50, 95, 99)         # Sojourn time percentiles shown and logged
 
 msg_list = []
 
+data_input_rates_watcher = None     # Watchers that re-parse the -i and -b JSON files only when they change
+bw_allocs_watcher = None
+use_inotify = True                  # Use inotify (Linux) to learn when the input files change, instead of stat()
+report_writer = None                # Radio Report log writer, opened on the first epoch
+report_format = 'csv'               # Radio Report log format: 'csv' text, or 'bin' fixed-width binary records
+report_flush_rows = 1000            # Flush the Radio Report log to disk after this many rows...
+report_flush_sec = 1.0              # ...or after this many seconds, whichever comes first
+
+render_thread = None                # Thread drawing the curses dashboard, if the dashboard is shown
+latest_snapshot = None              # Most recent EpochSnapshot published by the simulation for the render thread
+snapshot_ready = threading.Event()  # Set when a new snapshot is published
+stop_event = threading.Event()      # Set to stop the simulation and render threads (e.g. the 'x' key)
+max_fps = 30                        # Upper limit on the dashboard frame rate in realtime mode
+KEY_POLL_SEC = 0.05                 # How often the render thread checks for keypresses
+
+traffic_seed = None                 # Seed for the traffic models' random number generator (--seed)
+traffic_rng = None                  # NumPy random number generator shared by the traffic models, made on first use
+queue_shm = None                    # QueueSharedMemoryWriter (--shm): shared memory mirror of radio_queues.json
+radio_server = None                 # RadioQueueServer (--serve): inputs and queue outputs over a socket
+scheduler = None                    # EpochScheduler running the realtime epoch loop
+catch_up_policy = 'burst'           # What the scheduler does after an overrun: 'burst', 'skip' or 'stretch'
+last_db_inputs = ([], [])           # Last inputs read from the database, used again when a read fails
+input_errors = {}                   # (radio name, input key) -> (rejected settings, error), shown as messages
+
 # ------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------
 
 
 class Radio:
-    """Class to contain radio status and statistics."""
+    """Class to contain radio status and statistics.
+
+    The queue is modeled as a byte counter (q_len) rather than one element per queued byte, so the cost of an
+    epoch update does not depend on how deep the queue is.
+    """
     
     def __init__(self, name):
         self.name = name
-        self.q = deque()
         self.din_bps = 0                # bits per second
         self.dout_bps = 0               # bits per second
         self.inburst_factor = 0.0       # deviation from input value
@@ -62,23 +114,35 @@ class Radio:
         self.q_len = 0                  # bytes
         self.epochs_per_sec = 1         # number of epochs per second
         self.online = True              # status: True: online, False: offline
+        self.traffic = None             # TrafficModel for the data input rate, if any (see traffic_models.py)
+        self.classes = None             # ClassQueues, if the queue is split into DSCP classes (see class_queues.py)
         
     def update_q(self):
         if self.online is False:
             return
-        self.burst_din_bps = self.din_bps * (1+(random.uniform((-1*self.inburst_factor), self.inburst_factor)))
+        if self.traffic is not None:
+            self.burst_din_bps = self.traffic.next(self.din_bps)
+        else:
+            self.burst_din_bps = self.din_bps * (1+(random.uniform((-1*self.inburst_factor), self.inburst_factor)))
         self.q_delta_bps = self.burst_din_bps - self.dout_bps
 
+        if self.classes is not None:
+            q_len, epoch_value, value_per_kb_tx = update_class_queues(
+                [self.classes], [self.burst_din_bps], [self.dout_bps], self.epochs_per_sec,
+                MAX_QUEUE_SIZE_BYTES if enforce_max_q_size else None)
+            self.q_len = int(q_len[0])
+            self.current_epoch_value = float(epoch_value[0])
+            self.value_per_kb_tx = float(value_per_kb_tx[0])
+            return
+
         # if q_delta_bps is positive (+), then queue grows
         if self.q_delta_bps > 0:
             q_delta_per_epoch = int(math.ceil(self.q_delta_bps / self.epochs_per_sec / 8))
             q_bytes_remaining = MAX_QUEUE_SIZE_BYTES - self.q_len
             if enforce_max_q_size and (q_delta_per_epoch > q_bytes_remaining):
-                for x in range(q_bytes_remaining):
-                    self.q.append(x)
+                self.q_len += max(q_bytes_remaining, 0)     # Fill the queue up to the MAX_QUEUE_SIZE_BYTES limit
             else:
-                for x in range(q_delta_per_epoch):
-                    self.q.append(x)
+                self.q_len += q_delta_per_epoch
             self.current_epoch_value = ((self.dout_bps / self.epochs_per_sec) / 1000) * self.value_per_kb_tx
         # if q_delta_bps is negative (-), then queue shrinks
         elif self.q_delta_bps < 0:
@@ -86,15 +150,13 @@ class Radio:
             if self.q_len <= (abs(q_delta_per_epoch)):
                 self.current_epoch_value = (((self.din_bps / self.epochs_per_sec) / 1000) + ((self.q_len * 8) / 1000))\
                                            * self.value_per_kb_tx
-                self.q.clear()
+                self.q_len = 0
             else:
-                for x in range(abs(q_delta_per_epoch)):
-                    self.q.popleft()
+                self.q_len -= abs(q_delta_per_epoch)
                 self.current_epoch_value = ((self.dout_bps / self.epochs_per_sec) / 1000) * self.value_per_kb_tx
         # if q_delta_bps is 0, then queue remains the same
         elif self.q_delta_bps == 0:
             self.current_epoch_value = ((self.dout_bps / self.epochs_per_sec) / 1000) * self.value_per_kb_tx
-        self.q_len = len(self.q)
         
     def go_offline(self):
         self.online = False
@@ -105,8 +167,9 @@ class Radio:
         self.q_delta_bps = 0
         self.value_per_kb_tx = 0.0
         self.current_epoch_value = 0.0
-        self.q.clear()
-        self.q_len = len(self.q)
+        self.q_len = 0
+        if self.classes is not None:
+            self.classes.clear()
         
 
 # ------------------------------------------------------------------------------
@@ -122,6 +185,18 @@ class Message:
         self.msg = msg
 
 
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+# Immutable copies of the simulation state, published once per epoch for the render thread.  RadioSnapshot has the
+# same attribute names as Radio, so the print_*() functions can draw either.
+RadioSnapshot = namedtuple('RadioSnapshot', ['name', 'din_bps', 'dout_bps', 'q_delta_bps', 'q_len',
+                                             'current_epoch_value', 'value_per_kb_tx', 'epochs_per_sec', 'online',
+                                             'sojourn_ms'], defaults=(None,))
+EpochSnapshot = namedtuple('EpochSnapshot', ['epoch_num', 'time', 'radios', 'lm_stats', 'history',
+                                             'system_value', 'avg_system_value', 'avg_lm_eff_eff'])
+
+
 # ------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------
 
@@ -143,160 +218,305 @@ def setup_logger():
 
 def run_epoch():
     global epoch_num
-    global epochs_per_sec
-    global epoch_ms
-    global radio_list
-    global msg_list
-    global stdscr
-    # global next_timer
-    global time_pad
-    global text_d
+
+    ldict_radios, d_bw_allocs = load_epoch_inputs()
+    lm_stats = simulate_epoch(ldict_radios, d_bw_allocs)
+
+    if render_thread is not None:
+        publish_snapshot(lm_stats)          # The render thread draws the dashboard at its own frame rate
+    else:
+        if not headless:
+            handle_keypress()               # Debug mode has no render thread, so check for keypresses here
+        if realtime_mode or ((epoch_num % epochs_per_sec) == 0):
+            print_stats(radio_list)         # Headless or Debug mode: use print() to console rather than curses.
+    write_stats_to_csv(radio_list, epoch_num)
+    epoch_num = epoch_num + 1
+
+
+# ------------------------------------------------------------------------------
+
+
+def make_radio_snapshots(rlist):
+    # returns a list of RadioSnapshots of the Radios, in radio_list order
+    if engine is not None:
+        columns = engine.columns(('din_bps', 'dout_bps', 'q_delta_bps', 'q_len', 'current_epoch_value',
+                                  'value_per_kb_tx', 'online'))
+        eps = engine.epochs_per_sec
+        return [RadioSnapshot(name, din, dout, q_delta, q_len, epoch_value, value_per_kb_tx, eps, online,
+                              sojourn_ms(name) if track_latency else None)
+                for name, din, dout, q_delta, q_len, epoch_value, value_per_kb_tx, online
+                in zip(engine.names, *columns)]
+    return [RadioSnapshot(r.name, r.din_bps, r.dout_bps, r.q_delta_bps, r.q_len, r.current_epoch_value,
+                          r.value_per_kb_tx, r.epochs_per_sec, r.online, sojourn_ms(r.name) if track_latency else None)
+            for r in rlist]
+
+
+# ------------------------------------------------------------------------------
+
+
+def publish_snapshot(lm_stats):
+    # Publishes an immutable copy of this epoch's state for the render thread.  Only the latest snapshot is kept:
+    # if the display falls behind, the frames in between are dropped rather than slowing the simulation down.
+    global latest_snapshot
+
+    radios = make_radio_snapshots(radio_list)
+    latest_snapshot = EpochSnapshot(epoch_num, time.time(), radios, lm_stats, tuple(lm_eff_eff_vals_q),
+                                    system_value_stats.last, system_value_stats.mean, lm_eff_eff_stats.mean)
+    snapshot_ready.set()
+
+
+# ------------------------------------------------------------------------------
+
+
+def handle_keypress():
+    # Called from the render thread, which is the only thread that uses curses once the dashboard is running
+    # (or from run_epoch() in Debug mode)
     global realtime_mode
     global q_viz_mode
     global history_plot_mode
+
+    keypress = stdscr.getch()
+    if keypress != -1:
+        if keypress == ord('r'):    # If selected, use 'Realtime Mode'
+            realtime_mode = True
+        elif keypress == ord('s'):  # If selected, use 'Slow Refresh mode'
+            realtime_mode = False
+        elif keypress == ord('q'):  # If selected, toggle Queue Visualization
+            q_viz_mode = not q_viz_mode
+        elif keypress == ord('h'):  # If selected, toggle history plot
+            history_plot_mode = not history_plot_mode
+        elif keypress == ord('x'):  # If selected, exit application
+            stop_event.set()
+
+
+# ------------------------------------------------------------------------------
+
+
+def render_loop():
+    # Render thread: draws the latest snapshot once per epoch in realtime mode (at most max_fps frames per second),
+    # or once per second in slow refresh mode, and handles keypresses in between.
+    last_frame_time = 0.0
+    drawn = None
+
+    while not stop_event.is_set():
+        handle_keypress()
+
+        if realtime_mode:
+            frame_interval = max(epoch_sec, 1.0 / max_fps)
+        else:
+            frame_interval = 1.0
+        wait = last_frame_time + frame_interval - time.monotonic()
+        if wait > 0:
+            stop_event.wait(min(wait, KEY_POLL_SEC))
+            continue
+
+        snapshot = latest_snapshot
+        if snapshot is None or snapshot is drawn:
+            snapshot_ready.wait(KEY_POLL_SEC)
+            snapshot_ready.clear()
+            continue
+
+        render_frame(snapshot)
+        drawn = snapshot
+        last_frame_time = time.monotonic()
+
+
+# ------------------------------------------------------------------------------
+
+
+def render_frame(snapshot):
+    # Draws every dashboard panel from one EpochSnapshot
+    (total_bw_allocated_Mbps, utilization_of_max, total_bw_utilized, utilization_of_allocation,
+     effective_efficiency, avg_effective_efficiency) = snapshot.lm_stats
+
+    height, width = stdscr.getmaxyx()
+    stdscr.clear()
+    stdscr.noutrefresh()
+
+    # Sanity check for window height requirements
+    if height < 10:
+        bangs = '!' * int((width-49)/2)
+        msg1 = bangs + '  DID YOU WANT TO SEE SOMETHING IN THIS WINDOW?  ' + bangs
+        msg2 = bangs + '    TRY MAKING THE WINDOW A LITTLE BIT DEEPER.   ' + bangs
+        msg3 = bangs + '            RESIZE WINDOW TO CONTINUE            ' + bangs
+        stdscr.addstr(0, 0, "{0:^{1}}".format(msg1, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
+        stdscr.addstr(1, 0, "{0:^{1}}".format(msg2, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
+        stdscr.addstr(2, 0, "{0:^{1}}".format(msg3, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
+        stdscr.refresh()
+        return
+
+    if width < 50:
+        bangs = '!' * int((width-40)/2)
+        msg1 = bangs + '    NOT SURE WHAT YOU EXPECT TO SEE    ' + bangs
+        msg2 = bangs + '        ON SUCH A SKINNY SCREEN        ' + bangs
+        msg3 = bangs + '  TRY MAKING IT WIDER, OR RISK SKYNET  ' + bangs
+        stdscr.addstr(0, 0, "{0:^{1}}".format(msg1, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
+        stdscr.addstr(1, 0, "{0:^{1}}".format(msg2, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
+        stdscr.addstr(2, 0, "{0:^{1}}".format(msg3, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
+        stdscr.refresh()
+        return
+
+    # Print to screen
+    print_banner()
+    print_lm_stats(total_bw_allocated_Mbps, utilization_of_max, total_bw_utilized,
+                   utilization_of_allocation, effective_efficiency)
+    print_system_values(snapshot)
+    print_radio_stats(snapshot.radios)
+    if q_viz_mode is True:
+        print_queues(snapshot.radios)
+    if history_plot_mode is True:
+        print_history(snapshot.history, len(snapshot.radios), avg_effective_efficiency, q_viz_mode)
+    refresh_msg_list(utilization_of_max, effective_efficiency, snapshot.radios)
+    print_messages(msg_list)
+    print_time(snapshot)
+    print_toolbar()
+
+    stdscr.refresh()
+
+
+# ------------------------------------------------------------------------------
+
+
+def load_epoch_inputs():
+    # returns (list of Radio data input rate dictionaries, list of Radio bandwidth allocation dictionaries)
+    global database
     global data_input_rates
     global bw_allocs
-    global database
-    global headless
-
-    
-    # Set callback timer for next epoch update
-    # if not headless:
-    #     next_timer = threading.Timer(epoch_sec, run_epoch)
-    #     next_timer.start()
-    # Set Command Line Mode
-    if not headless:
-        height, width = stdscr.getmaxyx()
-        stdscr.nodelay(True)
-        keypress = stdscr.getch()
-        if keypress != -1:
-            if keypress == ord('r'):    # If selected, use 'Realtime Mode'
-                realtime_mode = True
-            elif keypress == ord('s'):  # If selected, use 'Slow Refresh mode'
-                realtime_mode = False
-            elif keypress == ord('q'):  # If selected, toggle Queue Visualization
-                q_viz_mode = not q_viz_mode
-            elif keypress == ord('h'):  # If selected, toggle history plot
-                history_plot_mode = not history_plot_mode
-            elif keypress == ord('x'):  # If selected, exit application
-                # next_timer.cancel()
-                restore_screen()
-                sys.exit()
+    global data_input_rates_watcher
+    global bw_allocs_watcher
+    global last_db_inputs
 
     # Reload JSON file for Radio Data Input Rates, parse contents, and update Radio objects
     # Reload JSON file for LM Bandwidth Allocations for Radio Data Output Rates (a.k.a. the "RF Drain Rate")
+    # The JSON files are only re-parsed when they have been rewritten (e.g. by datarate_updater.py)
+    # In scenario replay (-S), the timelines replace the files, and are applied at the epoch they are due
 
-    if database:
+    if radio_server is not None:
+        ldict_radios, d_bw_allocs = radio_server.inputs()          # The latest lists pushed by clients
+    elif database:
         try:
-            radio_usage_node_list = database.get_nodes_by_type('Radio_Input')
-            radio_control_node_list = database.get_nodes_by_type('Radio_Control')
-            radio_usage_node = radio_usage_node_list[0]
-            radio_control_node = radio_control_node_list[0]
-            ldict_radios = radio_usage_node.Input_Rate
-            d_bw_allocs = radio_control_node.BW_Allocs
-        except AttributeError as e:
-            print(e)
+            last_db_inputs = database.read_inputs()                # One read; record IDs are cached
+        except Exception as e:
+            print(e)                                                # Keep the last good inputs for this epoch
+        ldict_radios, d_bw_allocs = last_db_inputs
     else:
-        with open(data_input_rates, 'r') as f:
-            ldict_radios = json.load(f)
+        if (data_input_rates_watcher is None) and (scenario_rates is None):
+            data_input_rates_watcher = InputFileWatcher(data_input_rates, use_inotify=use_inotify)
+        if (bw_allocs_watcher is None) and (scenario_allocs is None):
+            bw_allocs_watcher = InputFileWatcher(bw_allocs, use_inotify=use_inotify)
+        ldict_radios = data_input_rates_watcher.get() if data_input_rates_watcher is not None else []
+        d_bw_allocs = bw_allocs_watcher.get() if bw_allocs_watcher is not None else []
+
+    if (scenario_rates is not None) or (scenario_allocs is not None):
+        t = scenario_time()
+        if scenario_rates is not None:
+            ldict_radios = scenario_rates.at(t)
+        if scenario_allocs is not None:
+            d_bw_allocs = scenario_allocs.at(t)
+
+    return ldict_radios, d_bw_allocs
+
+
+# ------------------------------------------------------------------------------
+
+
+def scenario_time():
+    # returns the scenario time (seconds) of the current epoch: its start time, wrapped around with --loop.
+    # In realtime, the start time is the epoch's release on the scheduler's time grid, which counts the epochs
+    # dropped or shifted by the catch-up policy, so that the scenario stays locked to wall-clock time.
+    # Wrapping is done in whole epochs, so that a change is applied at the same epoch on every pass.
+    epoch = scheduler.release if scheduler is not None else epoch_num
+    period_epochs = int(round((scenario_period * 1000) / epoch_ms))
+    if scenario_loop and (period_epochs > 0):
+        epoch = epoch % period_epochs
+    return (epoch * epoch_ms) / 1000
 
-        with open(bw_allocs, 'r') as f:
-            d_bw_allocs = json.load(f)
+
+# ------------------------------------------------------------------------------
+
+
+def simulate_epoch(ldict_radios, d_bw_allocs):
+    # Merges the epoch's inputs into the Radio list, updates every queue, and publishes the queue lengths.
+    # returns the LM statistics for the epoch
+    global radio_list
+    global database
 
     # Parse the list of Radio dictionaries from JSON file
+    input_names = set()
     for d in ldict_radios:
-        unknown_radio = True
-        for r in radio_list:
-            if r.name == d['RadioName']:
-                if debug == 3:
-                    print("found radio in list already")
-                unknown_radio = False
-                r.online = True
-                if "DataInRate-bps" in d:
-                    r.din_bps = d["DataInRate-bps"]
-                if "Burstiness" in d:
-                    r.inburst_factor = d["Burstiness"]
-                else:
-                    r.inburst_factor = 0.0
-                if "ValuePerKbTx" in d:
-                    r.value_per_kb_tx = d["ValuePerKbTx"]
-                break
-        if unknown_radio:
+        input_names.add(d['RadioName'])
+        r = radio_index.get(d['RadioName'])
+        if r is not None:
+            if debug == 3:
+                print("found radio in list already")
+            r.online = True
+            if "DataInRate-bps" in d:
+                r.din_bps = d["DataInRate-bps"]
+            if "Burstiness" in d:
+                r.inburst_factor = d["Burstiness"]
+            else:
+                r.inburst_factor = 0.0
+            if "ValuePerKbTx" in d and "Classes" not in d:
+                r.value_per_kb_tx = d["ValuePerKbTx"]
+            set_traffic_model(r, d)
+            set_class_queues(r, d)
+        else:
             add_radio_to_list(d)
 
     # If a Radio is removed from a test mission (e.g., the Data Input JSON file), then mark as "offline"
-    if len(ldict_radios) < len(radio_list):
-        for r in radio_list:
-            offline_radio = True
-            for d in ldict_radios:
-                if d['RadioName'] == r.name:
-                    offline_radio = False
-                    break
-            if offline_radio:
-                if r.online:
-                    r.go_offline()         # If the offline radio was previously online, call go_offline()
-                    if debug >= 1:
-                        print("'{}' has gone offline.".format(r.name))
-
-
+    if len(input_names) < len(radio_index):
+        offline_names = radio_index.keys() - input_names
+        for r in radio_list:                # in radio_list order, so the debug messages come out in display order
+            if r.name in offline_names and r.online:
+                r.go_offline()              # If the offline radio was previously online, call go_offline()
+                if debug >= 1:
+                    print("'{}' has gone offline.".format(r.name))
 
     # Parse the Bandwidth Allocations dictionaries from JSON file
+    alloc_names = set()
     for d in d_bw_allocs:
-        unknown_radio = True
-        for r in radio_list:
-            if r.name == d['RadioName']:
-                if debug == 3:
-                    print("found radio in list already")
-                unknown_radio = False
-                if "AllocatedBw-bps" in d:
-                    r.dout_bps = d["AllocatedBw-bps"]
-                else:
-                    r.dout_bps = 0
-                break
-        if unknown_radio:
+        alloc_names.add(d['RadioName'])
+        r = radio_index.get(d['RadioName'])
+        if r is not None:
+            if debug == 3:
+                print("found radio in list already")
+            if "AllocatedBw-bps" in d:
+                r.dout_bps = d["AllocatedBw-bps"]
+            else:
+                r.dout_bps = 0
+        else:
             add_radio_to_list(d)
 
     # If a Radio is removed from the LM's bandwidth allocations, zeroize the corresponding radio_list value for din_bps
-    if len(d_bw_allocs) < len(radio_list):
-        for r in radio_list:
-            unsched_radio = True
-            for d in d_bw_allocs:
-                if d['RadioName'] == r.name:
-                    unsched_radio = False
-                    break
-            if unsched_radio:
-                r.dout_bps = 0      # This radio is no longer being scheduled by the LM, so drop its allocations to 0
+    if len(alloc_names) < len(radio_index):
+        for name in radio_index.keys() - alloc_names:
+            radio_index[name].dout_bps = 0  # This radio is no longer being scheduled by the LM, so drop its allocations to 0
 
     # Update all Radio info
-    for r in radio_list:
-        r.update_q()
+    if engine is not None:
+        engine.update_queues()
+    else:
+        for r in radio_list:
+            r.update_q()
+    if track_latency:
+        update_latency(radio_list)
 
     # Add Logging Here
 
-    queues = write_qlens_to_json(radio_list)
-
-    if database:
-        try:
-            radio_queues_node_list = database.get_nodes_by_type("Radio_Queues")
-            radio_queues_node = radio_queues_node_list[0]
-
-            database.update_node(radio_queues_node._rid,
-                                 {'Radio_Queues': queues},
-                                 version=radio_queues_node._version,
-                                 transaction=True)
-        except Exception as e:
-            sys.exit(sys.exc_info())
+    if not batch_mode:                     # Nobody reads the queue lengths of a batch run until it completes
+        queues = write_qlens_to_json(radio_list)
+        if radio_server is not None:
+            radio_server.publish(epoch_num, queues)     # Sent to subscribers from the server thread
+        if queue_shm is not None:
+            queue_shm.publish(epoch_num, radio_list)
 
-    total_bw_allocated = 0
-    total_bw_utilized = 0
-
-    for r in radio_list:
-        total_bw_allocated += r.dout_bps
-        if r.current_epoch_value == 0:
-            total_bw_utilized += 0
-        else:
-            total_bw_utilized += ((r.current_epoch_value / r.value_per_kb_tx) * r.epochs_per_sec) / 1000  # in Mbps
+        if database:
+            try:
+                database.publish_queues(queues)     # Written by a background thread; never waits on the server
+            except Exception as e:
+                sys.exit(sys.exc_info())
 
+    total_bw_allocated, total_bw_utilized = calculate_bw_totals(radio_list)
     total_bw_allocated_Mbps = total_bw_allocated / 1000000
     utilization_of_max = (total_bw_allocated_Mbps / MAX_BW_MBPS) * 100
     if total_bw_allocated_Mbps == 0:
@@ -305,57 +525,10 @@ def run_epoch():
         utilization_of_allocation = float((total_bw_utilized / total_bw_allocated_Mbps) * 100)
     effective_efficiency = (total_bw_utilized / MAX_BW_MBPS) * 100
     avg_effective_efficiency = calculate_avg_lm_effective_efficiency(effective_efficiency)
+    calculate_avg_system_value(calculate_system_value(radio_list))
 
-    if realtime_mode or ((epoch_num % epochs_per_sec) == 0):
-        # Print windows and graphics panels if not in Debug mode
-        if debug == 0 and not headless:
-            stdscr.clear()
-            stdscr.noutrefresh()
-
-            # Sanity check for window height requirements
-            if height < 10:
-                bangs = '!' * int((width-49)/2)
-                msg1 = bangs + '  DID YOU WANT TO SEE SOMETHING IN THIS WINDOW?  ' + bangs
-                msg2 = bangs + '    TRY MAKING THE WINDOW A LITTLE BIT DEEPER.   ' + bangs
-                msg3 = bangs + '            RESIZE WINDOW TO CONTINUE            ' + bangs
-                stdscr.addstr(0, 0, "{0:^{1}}".format(msg1, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
-                stdscr.addstr(1, 0, "{0:^{1}}".format(msg2, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
-                stdscr.addstr(2, 0, "{0:^{1}}".format(msg3, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
-                stdscr.refresh()
-                return
-
-            if width < 50:
-                bangs = '!' * int((width-40)/2)
-                msg1 = bangs + '    NOT SURE WHAT YOU EXPECT TO SEE    ' + bangs
-                msg2 = bangs + '        ON SUCH A SKINNY SCREEN        ' + bangs
-                msg3 = bangs + '  TRY MAKING IT WIDER, OR RISK SKYNET  ' + bangs
-                stdscr.addstr(0, 0, "{0:^{1}}".format(msg1, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
-                stdscr.addstr(1, 0, "{0:^{1}}".format(msg2, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
-                stdscr.addstr(2, 0, "{0:^{1}}".format(msg3, width), text_d['ERROR_BLACK'] | curses.A_BOLD | BLINK)
-                stdscr.refresh()
-                return
-
-            # Print to screen
-            print_banner()
-            print_lm_stats(total_bw_allocated_Mbps, utilization_of_max, total_bw_utilized,
-                           utilization_of_allocation, effective_efficiency)
-            print_system_values(radio_list)
-            print_radio_stats(radio_list)
-            if q_viz_mode is True:
-                print_queues(radio_list)
-            if history_plot_mode is True:
-                print_history(lm_eff_eff_vals_q, len(radio_list), avg_effective_efficiency, q_viz_mode)
-            refresh_msg_list(utilization_of_max, effective_efficiency, radio_list)
-            print_messages(msg_list)
-            print_time()
-            print_toolbar()
-
-            stdscr.refresh()
-
-        else:
-            print_stats(radio_list)       # Debug mode: use print() to console rather than curses.
-    write_stats_to_csv(radio_list, epoch_num)
-    epoch_num = epoch_num + 1
+    return (total_bw_allocated_Mbps, utilization_of_max, total_bw_utilized, utilization_of_allocation,
+            effective_efficiency, avg_effective_efficiency)
 
 
 # ------------------------------------------------------------------------------
@@ -364,15 +537,21 @@ def run_epoch():
 def add_radio_to_list(radio_d):
     if debug == 3:
         print("New Radio found.  Adding to the Radio List")
-    new_radio = Radio(radio_d['RadioName'])
+    if engine is not None:
+        new_radio = engine.add_radio(radio_d['RadioName'])
+    else:
+        new_radio = Radio(radio_d['RadioName'])
     if "DataInRate-bps" in radio_d:
         new_radio.din_bps = radio_d['DataInRate-bps']
-    if "ValuePerKbTx" in radio_d:
+    if "ValuePerKbTx" in radio_d and "Classes" not in radio_d:
         new_radio.value_per_kb_tx = radio_d['ValuePerKbTx']
     if "AllocatedBw-bps" in radio_d:
         new_radio.dout_bps = radio_d['AllocatedBw-bps']
     new_radio.epochs_per_sec = epochs_per_sec
+    set_traffic_model(new_radio, radio_d)
+    set_class_queues(new_radio, radio_d)
     radio_list.append(new_radio)
+    radio_index[new_radio.name] = new_radio
     if debug == 1:
         print("'{}' has been added to the Radio List".format(radio_list[-1].name))
 
@@ -380,6 +559,168 @@ def add_radio_to_list(radio_d):
 # ------------------------------------------------------------------------------
 
 
+def set_traffic_model(r, radio_d):
+    # Gives the Radio the traffic model named by the dictionary's "TrafficModel" key (or none, if it has none).
+    # The model is only re-made when its settings change, so that it keeps its state from epoch to epoch.
+    global traffic_rng
+
+    # Bad settings (e.g. an unknown model, or a missing TraceFile) are reported, and the Radio keeps its model.
+    if "TrafficModel" not in radio_d:
+        input_errors.pop((r.name, "TrafficModel"), None)
+        if r.traffic is not None:
+            r.traffic = None
+        return
+
+    import traffic_models
+    spec = traffic_models.model_spec(radio_d)
+    if (r.traffic is None) or (r.traffic.spec != spec):
+        if rejected_input(r, "TrafficModel", spec):
+            return
+        if traffic_rng is None:
+            traffic_rng = traffic_models.np.random.default_rng(traffic_seed)
+        try:
+            r.traffic = traffic_models.make_traffic_model(radio_d, epochs_per_sec, traffic_rng)
+        except (ValueError, TypeError, OSError) as e:
+            reject_input(r, "TrafficModel", spec, e)
+            return
+    input_errors.pop((r.name, "TrafficModel"), None)
+
+
+# ------------------------------------------------------------------------------
+
+
+def set_class_queues(r, radio_d):
+    # Splits the Radio's queue into the DSCP classes of the dictionary's "Classes" key (or back into one queue, if
+    # it has none).  The class queues are only re-made when their settings change; their contents are kept if the
+    # number of classes stays the same.  Bad settings (e.g. a negative Share) are reported, and the Radio keeps its
+    # queues.
+    if "Classes" not in radio_d:
+        input_errors.pop((r.name, "Classes"), None)
+        if r.classes is not None:
+            r.classes = None
+        return
+
+    spec = (radio_d["Classes"], radio_d.get("Scheduler", 'strict'), radio_d.get("ValuePerKbTx", 0.0))
+    if (r.classes is None) or (r.classes.spec != spec):
+        if rejected_input(r, "Classes", spec):
+            return
+        try:
+            if ClassQueues is None:
+                raise ValueError("DSCP class queues need NumPy ('pip install numpy')")
+            classes = ClassQueues(*spec)
+        except (ValueError, TypeError, AttributeError) as e:
+            reject_input(r, "Classes", spec, e)
+            return
+        classes.spec = spec
+        if (r.classes is not None) and (len(r.classes) == len(classes)):
+            classes.q_len[:] = r.classes.q_len
+        elif r.classes is None:
+            classes.q_len[:] = classes.shares * r.q_len   # split the single queue's contents by the class shares
+        r.classes = classes
+        r.value_per_kb_tx = classes.mean_value()
+    input_errors.pop((r.name, "Classes"), None)
+
+
+# ------------------------------------------------------------------------------
+
+
+def rejected_input(r, key, spec):
+    # True if these settings of the Radio's key were already rejected (so they are not tried again every epoch)
+    error = input_errors.get((r.name, key))
+    return (error is not None) and (error[0] == spec)
+
+
+def reject_input(r, key, spec, e):
+    # Records bad settings of a Radio's input key, to be shown in the messages until they change
+    input_errors[(r.name, key)] = (spec, "Bad {} settings ignored: {}".format(key, e))
+    if render_thread is None:           # Not drawing the dashboard, so print it to the console
+        print("'{}': bad {} settings ignored: {}".format(r.name, key, e))
+
+
+# ------------------------------------------------------------------------------
+
+
+def update_latency(radios):
+    # Follows the epoch's arrivals and departures through each Radio's queue (or DSCP class queues), to find the
+    # sojourn time of the bytes it sent
+    from queue_latency import RadioLatency
+
+    for r in radios:
+        classes = r.classes
+        num_queues = len(classes) if classes is not None else 1
+        latency = radio_latency.get(r.name)
+        if (latency is None) or (len(latency.queues) != num_queues):
+            latency = radio_latency[r.name] = RadioLatency(AVG_WINDOW_SIZE, num_queues)
+        if r.online is False:
+            latency.clear()
+            continue
+
+        arrived = (r.burst_din_bps / r.epochs_per_sec) / 8
+        if classes is not None:
+            latency.update(epoch_num, (classes.shares * arrived).tolist(), classes.served.tolist(),
+                           classes.q_len.tolist())
+        else:
+            served = min(latency.queues[0].total + arrived, max((r.dout_bps / r.epochs_per_sec) / 8, 0))
+            latency.update(epoch_num, (arrived,), (served,), (r.q_len,))
+
+
+# ------------------------------------------------------------------------------
+
+
+def sojourn_ms(name):
+    # returns the (p50, p95, p99) sojourn times in ms of the bytes the named Radio sent in the averaging window,
+    # or None if it sent none
+    latency = radio_latency.get(name)
+    pcts = latency.percentiles(SOJOURN_PCTS) if latency is not None else None
+    if pcts is None:
+        return None
+    return tuple(p * epoch_ms for p in pcts)
+
+
+# ------------------------------------------------------------------------------
+
+
+def queue_full(r):
+    # True if the Radio's queue is at MAX_QUEUE_SIZE_BYTES; with DSCP class queues, the limit is per class
+    if r.classes is not None:
+        return bool((r.classes.q_len >= MAX_QUEUE_SIZE_BYTES).any())
+    return r.q_len >= MAX_QUEUE_SIZE_BYTES
+
+
+# ------------------------------------------------------------------------------
+
+
+def calculate_system_value(radios):
+    # returns the system value of the epoch: the sum of every Radio's epoch value
+    if engine is not None:
+        return float(engine.current_epoch_value[:engine.n].sum())
+    return sum(r.current_epoch_value for r in radios)
+
+
+# ------------------------------------------------------------------------------
+
+
+def calculate_bw_totals(radios):
+    # returns (total bandwidth allocated in bps, total bandwidth utilized in Mbps)
+    if engine is not None:
+        return engine.bw_totals()
+
+    total_bw_allocated = 0
+    total_bw_utilized = 0
+
+    for r in radios:
+        total_bw_allocated += r.dout_bps
+        if r.current_epoch_value == 0:
+            total_bw_utilized += 0
+        else:
+            total_bw_utilized += ((r.current_epoch_value / r.value_per_kb_tx) * r.epochs_per_sec) / 1000  # in Mbps
+
+    return total_bw_allocated, total_bw_utilized
+
+
+# ------------------------------------------------------------------------------
+
+
 def write_qlens_to_json(radios):
     # return queues to be used optionally write_qlens_to_database and log_updates
 
@@ -391,14 +732,18 @@ def write_qlens_to_json(radios):
         radio_d['RadioName'] = r.name
         radio_d['QLen'] = int(math.ceil(r.q_len / 8))
         radio_d['CurrentEpochValue'] = r.current_epoch_value
+        if r.classes is not None:
+            radio_d['ClassQLen'] = [int(math.ceil(q / 8)) for q in r.classes.q_len.tolist()]
         if r.online is True:
             radio_d['IsOnline'] = 1
         else:
             radio_d['IsOnline'] = 0
         queues.append(radio_d)
-    if database is None:
-        with open("radio_queues.json", "w") as f:
-            json.dump(queues, f, indent=4)
+    if database is None and radio_server is None:
+        # Write a temporary file and rename it over radio_queues.json, so that readers only ever see a complete file
+        with open("radio_queues.json.tmp", "w") as f:
+            json.dump(queues, f, separators=(',', ':'))
+        os.replace("radio_queues.json.tmp", "radio_queues.json")
 
     return queues
 
@@ -407,7 +752,8 @@ def write_qlens_to_json(radios):
 
 def print_stats(rlist):
     # if debug == 2:
-        print("EPOCH  | TIME              | Radio    | Allocated BW  | Data Input Rate | Queue Depth | Queue Status")
+        print("EPOCH  | TIME              | Radio    | Allocated BW  | Data Input Rate | Queue Depth | Queue Status" +
+              ("     | Sojourn p50/p95/p99" if track_latency else ""))
         now = time.time()
         for r in rlist:
             if r.online is False:
@@ -423,64 +769,48 @@ def print_stats(rlist):
             else:
                 q_status = " meh"
         
-            print("{0:6d} | {1:17f} | {2:8} | {3:8.3f} kbps | {4:8.3f} kbps   | {5:8.3f} KB |   {6:16} ".format(
+            line = "{0:6d} | {1:17f} | {2:8} | {3:8.3f} kbps | {4:8.3f} kbps   | {5:8.3f} KB |   {6:16} ".format(
                 epoch_num, 
                 now, 
                 r.name, 
                 (r.dout_bps / 1000), 
                 (r.din_bps / 1000),
                 (r.q_len / 1000),
-                q_status))
+                q_status)
+            if track_latency:
+                pcts = sojourn_ms(r.name)
+                line += "| {0:.0f}/{1:.0f}/{2:.0f} ms".format(*pcts) if pcts is not None else "| -"
+            print(line)
 # ------------------------------------------------------------------------------
 
 
 def write_stats_to_csv(rlist, epoch_num):
     global now
-    cwd = os.getcwd()
-    log_dir_name = 'Radio_Logs'
-    log_dir = os.path.join(cwd, log_dir_name)
-    log_file_name = "Radio_Report_{}.log".format(now)
-    log_file = os.path.join(log_dir, log_file_name)
-    header = ["Radio Name",
-              "Time",
-              "Epochs per Second",
-              "Epoch Count",
-              "Radio Status",
-              "Queue Length (bytes)",
-              "Data Input Rate (b/s)",
-              "Data Output Rate (b/s)",
-              "Epoch Value",
-              "Value per kb Tx"]
-    radio_dict_list = []
-    header_in_file = False
-
-    if not os.path.isdir(log_dir):
-        os.mkdir(log_dir)
-
-    if os.path.isfile(log_file):
-        with open(log_file, 'r') as csvfile:
-            reader = csv.DictReader(csvfile)
-            header_in_file = set(reader.fieldnames) == set(header)
-
-    for r in rlist:
-        radio_dict = {}
-        radio_dict["Radio Name"] = r.name
-        radio_dict["Time"] = now
-        radio_dict["Epochs per Second"] = r.epochs_per_sec
-        radio_dict["Epoch Count"] = epoch_num
-        radio_dict["Radio Status"] = r.online
-        radio_dict["Queue Length (bytes)"] = r.q_len
-        radio_dict["Data Input Rate (b/s)"] = r.burst_din_bps
-        radio_dict["Data Output Rate (b/s)"] = r.burst_din_bps
-        radio_dict["Epoch Value"] = r.current_epoch_value
-        radio_dict["Value per kb Tx"] = r.value_per_kb_tx
-        radio_dict_list.append(radio_dict)
-
-    with open(log_file, 'a') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=header)
-        if not header_in_file:
-            writer.writeheader()
-        writer.writerows(radio_dict_list)
+    global report_writer
+
+    if report_writer is None:
+        if report_format == 'bin':
+            log_file = os.path.join(os.getcwd(), 'Radio_Logs', "Radio_Report_{}.rqh".format(now))
+            report_writer = RadioHistoryWriter(log_file, epochs_per_sec, flush_rows=report_flush_rows,
+                                               flush_sec=report_flush_sec, latency=track_latency)
+        else:
+            log_file = os.path.join(os.getcwd(), 'Radio_Logs', "Radio_Report_{}.log".format(now))
+            report_writer = RadioReportWriter(log_file, now, flush_rows=report_flush_rows, flush_sec=report_flush_sec,
+                                              latency=track_latency)
+
+    if track_latency:
+        report_writer.write_epoch(rlist, epoch_num, [sojourn_ms(r.name) for r in rlist])
+    else:
+        report_writer.write_epoch(rlist, epoch_num)
+
+
+# ------------------------------------------------------------------------------
+
+
+def close_report():
+    # Flushes any buffered Radio Report rows to disk.  Called at exit and from the SIGINT handler.
+    if report_writer is not None:
+        report_writer.close()
 
 # ------------------------------------------------------------------------------
 
@@ -602,12 +932,12 @@ def print_radio_stats(rlist):
     global text_d
     global border_d
 
-    rwin_width = 87
+    rwin_width = 108 if track_latency else 87
 
     height, width = stdscr.getmaxyx()
     pad_height, pad_width = radio_pad.getmaxyx()
 
-    if pad_height != (len(rlist)+2):
+    if (pad_height != (len(rlist)+2)) or (pad_width != rwin_width):
         radio_pad = curses.newpad((len(rlist)+2), rwin_width)
         radio_pad.bkgd(text_d['BG'])
 
@@ -621,10 +951,12 @@ def print_radio_stats(rlist):
     radio_pad.addstr(0, 50, " Queue Depth ")
     radio_pad.addstr(0, 67, " Trend ")
     radio_pad.addstr(0, 76, " Value ")
+    if track_latency:
+        radio_pad.addstr(0, 88, " Sojourn (ms) ")
     
     txt_mode = curses.A_DIM
     
-    for idx, r in enumerate(radio_list, start=1):
+    for idx, r in enumerate(rlist, start=1):
         if r.online is False:
             q_status = 'OFF'
             txt_mode = (curses.color_pair(((idx-1) % 2) + 1) | curses.A_BOLD)
@@ -663,6 +995,13 @@ def print_radio_stats(rlist):
             radio_pad.addstr(idx, 84, star, text_d['WARNING_BLACK'])
         else:
             radio_pad.addstr(idx, 84, ' ')
+
+        if track_latency:
+            if r.sojourn_ms is not None:
+                sojourn_str = "| {0:5.0f} {1:5.0f} {2:5.0f} ".format(*r.sojourn_ms)
+            else:
+                sojourn_str = "| {0:^17} ".format('-')
+            radio_pad.addstr(idx, 86, sojourn_str, txt_mode)
         
     start_line_pos = 14
     last_line_pos = len(rlist) + 15
@@ -919,19 +1258,14 @@ def get_graph_char(a, b, thd):
 # ------------------------------------------------------------------------------
 
 
-def print_system_values(rlist):
+def print_system_values(snapshot):
     global system_value_pad
-    global AVG_WINDOW_SIZE
-    global lm_eff_eff_vals_q
 
     height, width = stdscr.getmaxyx()
 
-    sum_current_epoch_values = 0
-    for r in rlist:
-        sum_current_epoch_values += r.current_epoch_value
-
-    avg_sys_val = calculate_avg_system_value(sum_current_epoch_values)
-    avg_lm_eff_eff_val = (sum(lm_eff_eff_vals_q)) / (max(len(lm_eff_eff_vals_q), 1))
+    sum_current_epoch_values = snapshot.system_value
+    avg_sys_val = snapshot.avg_system_value
+    avg_lm_eff_eff_val = snapshot.avg_lm_eff_eff
 
     system_value_pad.addstr(0, 0, "  Current System Value:", curses.A_BOLD)
     system_value_pad.addstr(0, 25, "    {0:^10.3f}".format(sum_current_epoch_values))
@@ -939,7 +1273,7 @@ def print_system_values(rlist):
     system_value_pad.addstr(1, 25, "    {0:^10.3f}".format(avg_sys_val))
 
     system_value_pad.addstr(0, 45, "  LM Effective Efficiency:")
-    system_value_pad.addstr(0, 80, "{0:^8.2f}".format(lm_eff_eff_vals_q[-1]))
+    system_value_pad.addstr(0, 80, "{0:^8.2f}".format(snapshot.history[-1]))
     system_value_pad.addstr(1, 45, "  Average LM Effective Efficiency:")
     system_value_pad.addstr(1, 80, "{0:^8.2f}".format(avg_lm_eff_eff_val))
 
@@ -955,34 +1289,31 @@ def print_system_values(rlist):
 
 
 def calculate_avg_system_value(current_value):
-    global system_vals_array
-    global AVG_WINDOW_SIZE
-    global epoch_num
+    system_value_stats.push(current_value)
+    return system_value_stats.mean
 
-    if len(system_vals_array) < AVG_WINDOW_SIZE:
-        system_vals_array.append(float(current_value))
-    else:
-        pos = epoch_num % AVG_WINDOW_SIZE
-        system_vals_array[pos] = float(current_value)
 
-    return float(sum(system_vals_array)) / (max(len(system_vals_array), 1))
+# ------------------------------------------------------------------------------
+
+
+def calculate_avg_lm_effective_efficiency(current_value):
+    lm_eff_eff_vals_q.append(float(current_value))     # last HISTORY_SIZE values, for the history graph
+    lm_eff_eff_stats.push(current_value)
+    return lm_eff_eff_stats.mean
 
 
 # ------------------------------------------------------------------------------
 
 
-def calculate_avg_lm_effective_efficiency(current_value):
-    global lm_eff_eff_vals_q
+def init_avg_window(window):
+    # Sets the number of epochs in the sliding averages
     global AVG_WINDOW_SIZE
-    global epoch_num
-
-    if len(lm_eff_eff_vals_q) < AVG_WINDOW_SIZE:
-        lm_eff_eff_vals_q.append(float(current_value))
-    else:
-        lm_eff_eff_vals_q.popleft()
-        lm_eff_eff_vals_q.append(float(current_value))
+    global system_value_stats
+    global lm_eff_eff_stats
 
-    return float(sum(lm_eff_eff_vals_q)) / (max(len(lm_eff_eff_vals_q), 1))
+    AVG_WINDOW_SIZE = window
+    system_value_stats = RunningStats(window)
+    lm_eff_eff_stats = RunningStats(window, hist_bins=400, hist_min=0.0, hist_max=200.0)
 
 
 # ------------------------------------------------------------------------------
@@ -1001,6 +1332,9 @@ def refresh_msg_list(utilization_of_max, effective_efficiency, radios):
         new_msg = Message('LM', 'ERROR', "Effective Efficiency reported > 100%.  Check bandwidth allocated.")
         msg_list.append(new_msg)
 
+    for (name, _), (_, error) in list(input_errors.items()):
+        msg_list.append(Message(name, 'ERROR', error))
+
     for r in radios:
         if r.q_len / MAX_QUEUE_SIZE_BYTES >= 1.0:
             new_msg = Message(r.name, 'WARNING', "Queue is Full.")
@@ -1086,6 +1420,10 @@ def sig_handler(sig, frame):
     # global next_timer
     # next_timer.cancel()
 
+    stop_event.set()
+    if render_thread is not None:
+        render_thread.join(1.0)     # Let the render thread finish any frame it is drawing before curses is closed
+    close_report()
     restore_screen()
     sys.exit()
 
@@ -1142,14 +1480,13 @@ def print_toolbar():
 # ------------------------------------------------------------------------------
 
 
-def print_time():
+def print_time(snapshot):
     global stdscr
     global time_pad
     
     height, width = stdscr.getmaxyx()
     
-    now = time.time()
-    header_str = "EPOCH #{0:<6d} | TIME: {1:17f}".format(epoch_num, now)
+    header_str = "EPOCH #{0:<6d} | TIME: {1:17f}".format(snapshot.epoch_num, snapshot.time)
     time_pad.addstr(0, 0, "Epoch size: {0:4d}ms".format(epoch_ms), curses.A_BOLD)
     time_pad.addstr(1, 0, header_str, curses.A_BOLD)
     time_pad.addstr(2, 0, " ")
@@ -1163,21 +1500,207 @@ def print_time():
 # ------------------------------------------------------------------------------
 
 def run_epoch_loop():
-    # try:
-    while True:
-        start_time = time.time()
-        run_epoch()
-        time_waited = time.time() - start_time
-        if time_waited < epoch_sec:
-            time.sleep(epoch_sec - time_waited)
-    # except Exception as e:
-    #     print(e)
+    # Runs one epoch per epoch_ms of wall-clock time, against absolute deadlines, until stop_event is set
+    global scheduler
+
+    scheduler = EpochScheduler(epoch_sec, policy=catch_up_policy)
+    scheduler.run(run_epoch, stop_event)
+
+
+# ------------------------------------------------------------------------------
+
+
+def print_schedule_report():
+    # Prints the epoch deadline misses and jitter histograms at exit (after curses has restored the terminal)
+    if scheduler is not None and scheduler.epochs > 0:
+        print(scheduler.report())
+
+# ------------------------------------------------------------------------------
+
+
+def run_batch(rate_timeline, alloc_timeline, num_epochs):
+    # Faster-than-real-time simulation: epochs are run back-to-back with no sleeping and no display
+    global epoch_num
+
+    for _ in range(num_epochs):
+        sim_time = (epoch_num * epoch_ms) / 1000
+        simulate_epoch(rate_timeline.at(sim_time), alloc_timeline.at(sim_time))
+        write_stats_to_csv(radio_list, epoch_num)
+        epoch_num = epoch_num + 1
+
+
+# ------------------------------------------------------------------------------
+
+
+def percentile(sorted_values, pct):
+    # Linear interpolation between the closest ranks of an already sorted sequence
+    if len(sorted_values) == 0:
+        return 0.0
+    pos = (len(sorted_values) - 1) * (pct / 100)
+    lo = int(math.floor(pos))
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + ((sorted_values[hi] - sorted_values[lo]) * (pos - lo))
+
+
+# ------------------------------------------------------------------------------
+
+
+def summarize(values, pcts=(5, 50, 95)):
+    values = sorted(values)
+    summary = {'min': values[0] if values else 0.0,
+               'mean': (sum(values) / len(values)) if values else 0.0,
+               'max': values[-1] if values else 0.0}
+    for pct in pcts:
+        summary['p{}'.format(pct)] = percentile(values, pct)
+    return summary
+
+
+# ------------------------------------------------------------------------------
+
+
+def reset_simulation(seed):
+    # Clears all simulation state so that a process can run several independent simulations
+    global epoch_num
+    global engine
+    global traffic_seed
+    global traffic_rng
+
+    epoch_num = 0
+    radio_list.clear()
+    radio_index.clear()
+    msg_list.clear()
+    system_value_stats.clear()
+    lm_eff_eff_stats.clear()
+    lm_eff_eff_vals_q.clear()
+    radio_latency.clear()
+    input_errors.clear()
+    random.seed(seed)
+    traffic_seed = seed
+    traffic_rng = None
+    if engine is not None:
+        engine = type(engine)(epochs_per_sec, MAX_QUEUE_SIZE_BYTES, enforce_max_q_size, seed=seed)
+
+
+# ------------------------------------------------------------------------------
+
+
+def init_sweep_worker(config, rate_timeline, alloc_timeline, num_epochs):
+    # Runs once in each sweep worker process.  Sets up the same configuration as the parent process (this does
+    # not rely on fork()), and keeps the timelines so that each task only has to send its seed.
+    global batch_mode
+    global MAX_QUEUE_SIZE_BYTES
+    global enforce_max_q_size
+    global engine
+    global sweep_inputs
+
+    batch_mode = True
+    init_epoch_vals(config['epoch_ms'])
+    MAX_QUEUE_SIZE_BYTES = config['max_queue_size_bytes']
+    enforce_max_q_size = config['enforce_max_q_size']
+    init_avg_window(config['avg_window_size'])
+    if config['vectorized']:
+        from radio_engine import VectorEpochEngine
+        engine = VectorEpochEngine(epochs_per_sec, MAX_QUEUE_SIZE_BYTES, enforce_max_q_size)
+    else:
+        engine = None
+    sweep_inputs = (rate_timeline, alloc_timeline, num_epochs)
+
+
+# ------------------------------------------------------------------------------
+
+
+def run_sweep_seed(seed):
+    # Runs one seeded batch simulation in a sweep worker, and returns its summary statistics
+    global epoch_num
+
+    rate_timeline, alloc_timeline, num_epochs = sweep_inputs
+    reset_simulation(seed)
+    start_time = time.time()
+
+    q_lens = {}
+    overflows = {}
+    eff_effs = array('d')
+    for _ in range(num_epochs):
+        sim_time = (epoch_num * epoch_ms) / 1000
+        lm_stats = simulate_epoch(rate_timeline.at(sim_time), alloc_timeline.at(sim_time))
+        eff_effs.append(lm_stats[4])
+        for r in radio_list:
+            if r.name not in q_lens:
+                q_lens[r.name] = array('q')
+                overflows[r.name] = 0
+            q_lens[r.name].append(r.q_len)
+            if queue_full(r):
+                overflows[r.name] += 1
+        epoch_num = epoch_num + 1
+
+    radios = {}
+    for name, samples in q_lens.items():
+        samples = sorted(samples)
+        radios[name] = {'q_len_p50': percentile(samples, 50),
+                        'q_len_p95': percentile(samples, 95),
+                        'q_len_p99': percentile(samples, 99),
+                        'q_len_max': samples[-1],
+                        'overflow_epochs': overflows[name]}
+
+    return {'seed': seed,
+            'elapsed_sec': time.time() - start_time,
+            'mean_effective_efficiency': (sum(eff_effs) / len(eff_effs)) if eff_effs else 0.0,
+            'final_avg_effective_efficiency': lm_eff_eff_stats.mean,
+            'final_avg_system_value': system_value_stats.mean,
+            'radios': radios}
+
+
+# ------------------------------------------------------------------------------
+
+
+def run_sweep(seeds, workers, rate_timeline, alloc_timeline, num_epochs):
+    # Monte-Carlo sweep: runs one batch simulation per seed across a pool of worker processes, and aggregates
+    # the per-run results into one summary
+    config = {'epoch_ms': epoch_ms,
+              'max_queue_size_bytes': MAX_QUEUE_SIZE_BYTES,
+              'enforce_max_q_size': enforce_max_q_size,
+              'vectorized': engine is not None,
+              'avg_window_size': AVG_WINDOW_SIZE}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_sweep_worker,
+                             initargs=(config, rate_timeline, alloc_timeline, num_epochs)) as executor:
+        runs = list(executor.map(run_sweep_seed, seeds))
+
+    radio_names = []
+    for run in runs:
+        for name in run['radios']:
+            if name not in radio_names:
+                radio_names.append(name)
+
+    radios = {}
+    for name in radio_names:
+        radio_runs = [run['radios'][name] for run in runs if name in run['radios']]
+        radios[name] = {key: summarize([radio_run[key] for radio_run in radio_runs])
+                        for key in ('q_len_p50', 'q_len_p95', 'q_len_p99', 'q_len_max', 'overflow_epochs')}
+        radios[name]['runs_with_overflow'] = sum(1 for radio_run in radio_runs if radio_run['overflow_epochs'] > 0)
+
+    return {'runs': len(runs),
+            'epochs_per_run': num_epochs,
+            'epoch_ms': epoch_ms,
+            'max_queue_size_bytes': MAX_QUEUE_SIZE_BYTES,
+            'enforce_max_q_size': enforce_max_q_size,
+            'lm_effective_efficiency': {
+                'mean_per_run': summarize([run['mean_effective_efficiency'] for run in runs]),
+                'final_avg_per_run': summarize([run['final_avg_effective_efficiency'] for run in runs])},
+            'system_value': {
+                'final_avg_per_run': summarize([run['final_avg_system_value'] for run in runs])},
+            'radios': radios,
+            'per_run': [{key: run[key] for key in ('seed', 'elapsed_sec', 'mean_effective_efficiency',
+                                                   'final_avg_effective_efficiency', 'final_avg_system_value')}
+                        for run in runs]}
+
 
 # ------------------------------------------------------------------------------
 
 
 def main(stdscr):
     global text_d
+    global render_thread
 
     # Color Pair Setup
     curses.init_pair(1, 182, 235)  # purplish 1
@@ -1393,9 +1916,18 @@ def main(stdscr):
         message_pad.bkgd(text_d['BG'])
         toolbar_pad.bkgd(text_d['BG'])
         stdscr.clear()
+
+        # Curses is only used from the render thread from here on
+        render_thread = threading.Thread(target=render_loop, name='RadioQueue-render', daemon=True)
+        render_thread.start()
+    stdscr.nodelay(True)                            # Keypresses are polled, never waited for
     # run_epoch()
     run_epoch_loop()
 
+    if render_thread is not None:
+        render_thread.join()
+    sys.exit()                                      # e.g. 'x' was pressed
+
 
 
 
@@ -1407,20 +1939,67 @@ if __name__ == "__main__":
     # Argument Parser Declarations
     parser = argparse.ArgumentParser()
     parser.add_argument('-I', action='store_false', default=True, dest='enforce_max_q_size',
-                        help='Infinite Queue Size (not limited by the MAX_QUEUE_SIZE). \r'
-                             'WARNING: This can utilize a lot of system resources.  \r'
-                             'Use at your own risk!')
+                        help='Infinite Queue Size (not limited by the MAX_QUEUE_SIZE).')
+    parser.add_argument('--poll-inputs', action='store_false', default=True, dest='use_inotify',
+                        help='Check the -i and -b files for changes with stat() every epoch instead of inotify')
     parser.add_argument('-M', action='store', default=-1, dest='max_queue_size',
                         help='Set MAX queue size in Bytes [default: 4194240]', type=int)
     parser.add_argument('-E', action='store', default=100, dest='epoch_size_ms',
                         help='Set the Epoch size (milliseconds) [default: 100]', type=int)
+    parser.add_argument('-W', action='store', default=AVG_WINDOW_SIZE, dest='avg_window_size',
+                        help='Number of epochs in the sliding averages [default: 100]', type=int)
     parser.add_argument('-r', action='store_true', default=False, dest='realtime_mode',
                         help='Realtime mode (screen updates 1x per epoch.  Default: Slow Refresh rate (1x per sec)')
+    parser.add_argument('--catch-up', action='store', default=catch_up_policy, dest='catch_up',
+                        choices=EpochScheduler.POLICIES,
+                        help="What to do when epochs fall behind wall-clock time: 'burst' runs the missed epochs "
+                             "back-to-back, 'skip' drops them, 'stretch' shifts the schedule [default: burst]")
+    parser.add_argument('--max-fps', action='store', default=max_fps, dest='max_fps', type=float,
+                        help='Maximum dashboard frames per second in realtime mode [default: 30]')
     parser.add_argument('-d', action='store', default=0, dest='debug', help='Set the Debug level', type=int)
     parser.add_argument('-v', '--version', action='version', version='%(prog)s 1.3.2')
     parser.add_argument('-i', action='store', dest='data_input_rates', help='Json with the data  input rates for a set of Radios', type=str)
     parser.add_argument('-b', action='store', dest='bw_allocs', help='Json with the avaliable bandwidth for a set of Radios', type=str)
     parser.add_argument('-H', action='store_true', dest='headless_mode', help='If set, RadioQueue will run in headless mode.')
+    parser.add_argument('-V', action='store_true', default=False, dest='vectorized',
+                        help='Use the vectorized (NumPy) epoch engine.  Recommended for large numbers of radios.')
+    parser.add_argument('--batch', action='store', default=None, dest='batch', type=str,
+                        help='Batch mode: run the scenario CSV file (the gen_datarate_scenario.py format) as fast '
+                             'as possible, with no display.  Allocations come from --bw-timeline, or from -b.')
+    parser.add_argument('-S', '--scenario', action='store', default=None, dest='scenario', type=str,
+                        help='Replay the scenario CSV file (the gen_datarate_scenario.py format) in real time, '
+                             'instead of reading the -i file')
+    parser.add_argument('--loop', action='store_true', default=False, dest='scenario_loop',
+                        help='Repeat the -S scenario (and --bw-timeline) from the start when it ends')
+    parser.add_argument('--bw-timeline', action='store', default=None, dest='bw_timeline', type=str,
+                        help='CSV file of bandwidth allocations for batch mode or -S: <TIME>, <RADIO_NAME>, '
+                             '<ALLOCATED_BW_BPS>')
+    parser.add_argument('--duration', action='store', default=None, dest='duration', type=float,
+                        help='Simulated duration (seconds) of a batch run [default: end of the scenario]')
+    parser.add_argument('--seed', action='store', default=None, dest='seed', type=int,
+                        help='Seed for the random number generator, for reproducible runs')
+    parser.add_argument('--sweep', action='store', default=None, dest='sweep', type=int,
+                        help='Monte-Carlo sweep: run the batch scenario this many times, with seeds SEED, SEED+1, ...')
+    parser.add_argument('--workers', action='store', default=None, dest='workers', type=int,
+                        help='Number of worker processes for a sweep [default: number of CPUs]')
+    parser.add_argument('--sweep-summary', action='store', default=None, dest='sweep_summary', type=str,
+                        help='Output JSON file for the sweep summary [default: Radio_Logs/Radio_Sweep_<time>.json]')
+    parser.add_argument('--serve', action='store', default=None, dest='serve', type=str,
+                        help="Serve inputs and queue outputs as newline-delimited JSON on a socket: 'unix:<path>' or "
+                             "'tcp:<host>:<port>'.  -i and -b, if given, set the initial inputs.")
+    parser.add_argument('--shm', action='store', default=None, dest='shm', type=str,
+                        help='Also publish the queue lengths each epoch to the named shared memory segment')
+    parser.add_argument('--shm-radios', action='store', default=256, dest='shm_radios', type=int,
+                        help='Number of radios the --shm segment has room for [default: 256]')
+    parser.add_argument('--latency', action='store_true', default=False, dest='latency',
+                        help='Track the queueing delay of the data each radio sends, and show and log its p50/p95/p99 '
+                             'sojourn time')
+    parser.add_argument('--log-format', action='store', default='csv', dest='log_format', choices=['csv', 'bin'],
+                        help="Radio Report log format: 'csv' text, or 'bin' fixed-width binary records [default: csv]")
+    parser.add_argument('--log-flush-rows', action='store', default=1000, dest='log_flush_rows', type=int,
+                        help='Flush the Radio Report log to disk every N rows [default: 1000]')
+    parser.add_argument('--log-flush-sec', action='store', default=1.0, dest='log_flush_sec', type=float,
+                        help='Flush the Radio Report log to disk every N seconds [default: 1.0]')
     parser.add_argument('--config', action='store', default=None, dest='config', help='Set config file for OrientDB ', type=str)
     parser.add_argument('--database', action='store', default=None, dest='database', help='Sets the name of the OrientDB database', type=str)
     cli_args = parser.parse_args()
@@ -1437,36 +2016,145 @@ if __name__ == "__main__":
     data_input_rates = cli_args.data_input_rates
     bw_allocs = cli_args.bw_allocs
     init_epoch_vals(cli_args.epoch_size_ms)   # Pass CLI Epoch size (ms) to the init_epoch_vals() function
+    if cli_args.avg_window_size < 1:
+        parser.error("-W: the sliding average window must be at least 1 epoch")
+    init_avg_window(cli_args.avg_window_size)
     headless = cli_args.headless_mode
+    use_inotify = cli_args.use_inotify
+    report_format = cli_args.log_format
+    report_flush_rows = cli_args.log_flush_rows
+    report_flush_sec = cli_args.log_flush_sec
+    atexit.register(close_report)
+    atexit.register(print_schedule_report)
+    catch_up_policy = cli_args.catch_up
     database = None
-    if cli_args.database is not None and cli_args.config is not None:
+    if cli_args.database == ':memory:':
+        # In-process stand-in for the OrientDB database, loaded from the -i and -b files as SetUpQueues.py would
+        from db_exchange import DatabaseExchange, InMemoryBackend
+        backend = InMemoryBackend()
+        with open(data_input_rates, 'r') as f:
+            backend.create_node('Radio_Input', {'Input_Rate': json.load(f)})
+        with open(bw_allocs, 'r') as f:
+            backend.create_node('Radio_Control', {'BW_Allocs': json.load(f)})
+        backend.create_node('Radio_Queues', {'Radio_Queues': []})
+        database = DatabaseExchange(backend)
+        atexit.register(database.close)
+    elif cli_args.database is not None and cli_args.config is not None:
         from brass_api.orientdb.orientdb_helper import BrassOrientDBHelper
-        database = BrassOrientDBHelper(cli_args.database, cli_args.config)
-        database.open_database()
+        from db_exchange import DatabaseExchange, OrientDBBackend
+        helpers = []
+        for _ in range(2):          # one connection for the epoch loop's reads, one for the writer thread
+            helper = BrassOrientDBHelper(cli_args.database, cli_args.config)
+            helper.open_database()
+            helpers.append(helper)
+        database = DatabaseExchange(OrientDBBackend(*helpers))
+        atexit.register(database.close)
+
+    if cli_args.serve is not None:
+        from radio_server import RadioQueueServer
+        initial_inputs = []
+        for input_file in (data_input_rates, bw_allocs):
+            if input_file is not None:
+                with open(input_file, 'r') as f:
+                    initial_inputs.append(json.load(f))
+            else:
+                initial_inputs.append([])
+        radio_server = RadioQueueServer(cli_args.serve, *initial_inputs)
+        radio_server.start()
+        atexit.register(radio_server.close)
 
+    if cli_args.shm is not None:
+        from queue_shm import QueueSharedMemoryWriter
+        queue_shm = QueueSharedMemoryWriter(cli_args.shm, cli_args.shm_radios)
+        atexit.register(queue_shm.close)
+
+    track_latency = cli_args.latency
     enforce_max_q_size = cli_args.enforce_max_q_size
     if cli_args.max_queue_size >= 0:
         MAX_QUEUE_SIZE_BYTES = cli_args.max_queue_size    # Set MAX Queue Size in Byte if CLI argument provided
 
+    if cli_args.seed is not None:
+        random.seed(cli_args.seed)
+        traffic_seed = cli_args.seed
+
+    if cli_args.vectorized:
+        from radio_engine import VectorEpochEngine
+        engine = VectorEpochEngine(epochs_per_sec, MAX_QUEUE_SIZE_BYTES, enforce_max_q_size, seed=cli_args.seed)
+
     realtime_mode = cli_args.realtime_mode
+    max_fps = cli_args.max_fps
     q_viz_mode = True
     history_plot_mode = True
     debug = cli_args.debug
     text_d = {}
     border_d = {}
     graph_d = {}
-    if headless:
-        run_epoch_loop
-        # try:
-        #     while True:
-        #         start_time = time.time()
-        #         run_epoch()
-        #         time_waited = time.time() - start_time
-        #         if time_waited < epoch_sec:
-        #             time.sleep(epoch_sec-time_waited)
-        # except Exception as e:
-        #     print(e)
-    elif not headless:
+    if cli_args.sweep is not None and cli_args.batch is None:
+        parser.error("--sweep runs a batch scenario: use it with --batch")
+    if cli_args.scenario is not None and cli_args.batch is not None:
+        parser.error("-S replays a scenario in real time, and --batch runs one as fast as possible: use one of them")
+
+    if cli_args.scenario is not None:
+        scenario_rates = load_rate_timeline(cli_args.scenario)
+        if cli_args.bw_timeline is not None:
+            scenario_allocs = load_alloc_timeline(cli_args.bw_timeline)
+        scenario_loop = cli_args.scenario_loop
+        scenario_period = max(scenario_rates.end_time(),
+                              scenario_allocs.end_time() if scenario_allocs is not None else 0)
+
+    if cli_args.batch is not None:
+        batch_mode = True
+        rate_timeline = load_rate_timeline(cli_args.batch)
+        if cli_args.bw_timeline is not None:
+            alloc_timeline = load_alloc_timeline(cli_args.bw_timeline)
+        elif bw_allocs is not None:
+            with open(bw_allocs, 'r') as f:
+                alloc_timeline = Timeline([(0, json.load(f))])
+        else:
+            parser.error("batch mode needs bandwidth allocations: use --bw-timeline or -b")
+
+        if cli_args.duration is not None:
+            duration = cli_args.duration
+        else:
+            duration = max(rate_timeline.end_time(), alloc_timeline.end_time())
+        num_epochs = int(round((duration * 1000) / epoch_ms))
+
+        start_time = time.time()
+        if cli_args.sweep is not None:
+            first_seed = cli_args.seed if cli_args.seed is not None else 0
+            seeds = list(range(first_seed, first_seed + cli_args.sweep))
+            summary = run_sweep(seeds, cli_args.workers, rate_timeline, alloc_timeline, num_epochs)
+
+            summary_file = cli_args.sweep_summary
+            if summary_file is None:
+                if not os.path.isdir('Radio_Logs'):
+                    os.mkdir('Radio_Logs')
+                summary_file = os.path.join('Radio_Logs', "Radio_Sweep_{}.json".format(now))
+            with open(summary_file, 'w') as f:
+                json.dump(summary, f, indent=4)
+
+            print("Simulated {0} runs of {1} epochs ({2:.1f} seconds) in {3:.2f} seconds.".format(
+                len(seeds), num_epochs, duration, time.time() - start_time))
+            print("Mean LM Effective Efficiency per run: {0[min]:.2f}% min, {0[p50]:.2f}% median, "
+                  "{0[max]:.2f}% max".format(summary['lm_effective_efficiency']['mean_per_run']))
+            print("Sweep Summary: {0}".format(os.path.abspath(summary_file)))
+        else:
+            run_batch(rate_timeline, alloc_timeline, num_epochs)
+            print("Simulated {0} epochs ({1:.1f} seconds) in {2:.2f} seconds.".format(
+                num_epochs, duration, time.time() - start_time))
+            print("Average LM Effective Efficiency (last {0} epochs): {1:.2f}%".format(
+                len(lm_eff_eff_stats), lm_eff_eff_stats.mean))
+            print("LM Effective Efficiency (last {0} epochs): {1:.2f}% min, {2:.2f}% median, {3:.2f}% p95, "
+                  "{4:.2f}% max, {5:.2f}% EWMA".format(len(lm_eff_eff_stats), lm_eff_eff_stats.min,
+                                                       lm_eff_eff_stats.percentile(50),
+                                                       lm_eff_eff_stats.percentile(95), lm_eff_eff_stats.max,
+                                                       lm_eff_eff_stats.ewma))
+            print("Average System Value (last {0} epochs): {1:.3f}".format(len(system_value_stats),
+                                                                          system_value_stats.mean))
+            print("Radio Report: {0}".format(report_writer.log_file))
+    elif headless:
+        run_epoch_loop()
+    else:
         stdscr = curses.initscr()                # Initial main screen for curses
         banner_pad = curses.newpad(4, 90)        # Initialize Banner Pad
         system_value_pad = curses.newpad(4, 90)  # Initialize System Value Pad
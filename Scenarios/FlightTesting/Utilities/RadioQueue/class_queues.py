@@ -0,0 +1,183 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---          DSCP Class Queues for the Radio Queue Status Display          ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Splits a radio's single queue into several traffic class (DSCP)        ---
+# --- queues, each with its own share of the data input rate and value per   ---
+# --- KB, drained by a strict priority, WRR or DRR scheduler.  The drain is  ---
+# --- computed in closed form per epoch (a fluid model of the scheduler),    ---
+# --- for all radios at once, rather than byte by byte or packet by packet.  ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+#
+# data_input_rates.json keys (in addition to "RadioName", "DataInRate-bps", ...):
+#   "Classes": [{"DSCP": 46, "Share": 0.2, ...}, ...]
+#                   the class queues, highest priority first.  "Share" is the class's fraction of the data input
+#                   rate [default: equal shares]; the shares are normalized to add up to 1.
+#   "Scheduler": "strict"   strict priority [default]: a class is only served once every class before it is empty
+#   "Scheduler": "wrr"      weighted round robin: each round serves "Weight" packets [default: 1] of
+#                           "PacketSize-bytes" bytes [default: 1500] from each class
+#   "Scheduler": "drr"      deficit round robin: each round serves "Quantum-bytes" bytes [default: 1500] from
+#                           each class
+#   "ValuePerKbTx": [8.0, 4.0, 1.0]
+#                   value per KB transmitted of each class, in the order of "Classes" (or one number for all)
+#
+# Over an epoch, WRR and DRR both converge to weighted fair sharing of the allocated bandwidth, in proportion to
+# Weight * PacketSize-bytes or Quantum-bytes: a class that needs less than its share is served completely, and the
+# bandwidth it leaves is shared among the others in the same proportions (water-filling).
+
+import numpy as np
+
+
+SCHEDULERS = ('strict', 'wrr', 'drr')
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class ClassQueues:
+    """The class queues of one radio: per-class settings, and the queue length of each class in bytes."""
+
+    def __init__(self, classes, scheduler='strict', value_per_kb_tx=0.0):
+        if not classes:
+            raise ValueError("Classes must list at least one class")
+        self.scheduler = str(scheduler).lower()
+        if self.scheduler not in SCHEDULERS:
+            raise ValueError("Unknown Scheduler '{}': use strict, wrr or drr".format(scheduler))
+
+        self.names = [str(c.get("Name", c.get("DSCP", i))) for i, c in enumerate(classes)]
+        shares = np.array([float(c.get("Share", 1.0)) for c in classes])
+        if (shares < 0).any() or shares.sum() <= 0:
+            raise ValueError("Class shares must not be negative, and must not all be 0")
+        self.shares = shares / shares.sum()
+
+        if self.scheduler == 'wrr':
+            self.weights = np.array([float(c.get("Weight", 1)) * float(c.get("PacketSize-bytes", 1500))
+                                     for c in classes])
+        elif self.scheduler == 'drr':
+            self.weights = np.array([float(c.get("Quantum-bytes", 1500)) for c in classes])
+        else:
+            self.weights = np.ones(len(classes))
+        if (self.weights <= 0).any():
+            raise ValueError("Class weights and quanta must be > 0")
+
+        if isinstance(value_per_kb_tx, (list, tuple)):
+            if len(value_per_kb_tx) != len(classes):
+                raise ValueError("ValuePerKbTx lists {} values for {} classes".format(len(value_per_kb_tx),
+                                                                                      len(classes)))
+            self.values = np.array(value_per_kb_tx, dtype=float)
+        else:
+            self.values = np.full(len(classes), float(value_per_kb_tx))
+
+        self.q_len = np.zeros(len(classes))     # bytes
+        self.served = np.zeros(len(classes))    # bytes sent from each class in the last epoch
+        self.spec = None            # the data_input_rates.json settings these queues were made from
+
+    def __len__(self):
+        return len(self.names)
+
+    def mean_value(self):
+        # value per KB of the data input, i.e. averaged over the classes by their shares
+        return float((self.shares * self.values).sum())
+
+    def clear(self):
+        self.q_len[:] = 0
+        self.served[:] = 0
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+def drain(backlog, weights, capacity, scheduler):
+    """Bytes served from each class queue in one epoch.
+
+    backlog and weights are (radios, classes) arrays, capacity is the bytes each radio can send in the epoch.
+    Classes with a weight of 0 are padding (and must have no backlog).
+    """
+    capacity = capacity[:, None]
+    if scheduler == 'strict':
+        before = np.cumsum(backlog, axis=1) - backlog       # backlog of the higher priority classes
+        return np.clip(capacity - before, 0, backlog)
+
+    # Water-filling: serve the classes in order of backlog / weight.  Class j (in that order) is served completely
+    # if its backlog / weight is within the level the remaining capacity allows the classes from j onward; the
+    # first class that is not sets the level for itself and all the classes after it.
+    ratio = np.divide(backlog, weights, out=np.zeros_like(backlog), where=(weights > 0))
+    order = np.argsort(ratio, axis=1, kind='stable')
+    b = np.take_along_axis(backlog, order, axis=1)
+    w = np.take_along_axis(weights, order, axis=1)
+    r = np.take_along_axis(ratio, order, axis=1)
+    remaining = capacity - (np.cumsum(b, axis=1) - b)
+    w_from_here = np.cumsum(w[:, ::-1], axis=1)[:, ::-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        level = np.where(w_from_here > 0, remaining / w_from_here, np.inf)
+    satisfied = np.cumprod(r <= level, axis=1, dtype=bool)
+    first = satisfied.sum(axis=1)
+    water = np.take_along_axis(np.concatenate([level, np.full((len(b), 1), np.inf)], axis=1), first[:, None], axis=1)
+    served = np.where(w > 0, np.minimum(b, w * water), b)
+    out = np.empty_like(served)
+    np.put_along_axis(out, order, served, axis=1)
+    return out
+
+
+# ------------------------------------------------------------------------------
+
+
+def update_class_queues(queues, burst_din_bps, dout_bps, epochs_per_sec, max_queue_size_bytes=None):
+    """Runs one epoch of the class queues of several radios.
+
+    queues is a list of ClassQueues, burst_din_bps and dout_bps the radios' actual data input rates and allocated
+    bandwidths.  Radios are grouped by scheduler and drained as one padded (radios, classes) array per
+    group.  When max_queue_size_bytes is given, it limits each class queue, and the excess is dropped.
+
+    returns (total queue length in bytes, epoch value, value per KB transmitted) of each radio
+    """
+    burst_din_bps = np.asarray(burst_din_bps, dtype=float)
+    dout_bps = np.asarray(dout_bps, dtype=float)
+    n = len(queues)
+    q_len = np.zeros(n, dtype=np.int64)
+    epoch_value = np.zeros(n)
+    value_per_kb_tx = np.zeros(n)
+
+    for scheduler in SCHEDULERS:
+        rows = [i for i, cq in enumerate(queues) if cq.scheduler == scheduler]
+        if not rows:
+            continue
+        k = max(len(queues[i]) for i in rows)
+        shares = np.zeros((len(rows), k))
+        weights = np.zeros((len(rows), k))
+        values = np.zeros((len(rows), k))
+        backlog = np.zeros((len(rows), k))
+        for row, i in enumerate(rows):
+            cq = queues[i]
+            shares[row, :len(cq)] = cq.shares
+            weights[row, :len(cq)] = cq.weights
+            values[row, :len(cq)] = cq.values
+            backlog[row, :len(cq)] = cq.q_len
+
+        rows = np.array(rows)
+        backlog += shares * (burst_din_bps[rows] / epochs_per_sec / 8)[:, None]
+        served = drain(backlog, weights, dout_bps[rows] / epochs_per_sec / 8, scheduler)
+        left = backlog - served
+        if max_queue_size_bytes is not None:
+            np.minimum(left, max_queue_size_bytes, out=left)
+
+        served_kb = (served * 8) / 1000
+        value = (served_kb * values).sum(axis=1)
+        total_kb = served_kb.sum(axis=1)
+        mean_value = (shares * values).sum(axis=1)
+        q_len[rows] = np.ceil(left.sum(axis=1) - 1e-9).astype(np.int64)
+        epoch_value[rows] = value
+        # Effective value per KB of what was sent this epoch, so that epoch value / value per KB is still the KB sent
+        value_per_kb_tx[rows] = np.divide(value, total_kb, out=mean_value, where=(total_kb > 0))
+        for row, i in enumerate(rows.tolist()):
+            queues[i].q_len[:] = left[row, :len(queues[i])]
+            queues[i].served[:] = served[row, :len(queues[i])]
+
+    return q_len, epoch_value, value_per_kb_tx
@@ -0,0 +1,191 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---          Database Exchange for the Radio Queue Status Display          ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Reads the Radio_Input and Radio_Control nodes and writes the           ---
+# --- Radio_Queues node (see SetUpQueues.py) for RadioQueue's --database     ---
+# --- mode.  Record IDs are looked up once, both input nodes are read in one ---
+# --- query, and queue updates are written by a background thread on its     ---
+# --- own connection, so the epoch never waits on the database server.       ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+import copy
+import threading
+from types import SimpleNamespace
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class OrientDBBackend:
+    """Backend for brass_api BrassOrientDBHelpers (opened OrientDB databases).
+
+    A pyorient connection is not thread-safe, so the epoch loop and the writer thread each have their own: helper
+    for reads (and the record ID lookups, made before the writer starts), writer_helper for the Radio_Queues
+    updates.  Neither thread ever waits on the other's requests.  read() gets all the records in one query.
+    """
+
+    def __init__(self, helper, writer_helper):
+        self.helper = helper
+        self.writer_helper = writer_helper
+        self.versions = {}          # rid -> last known record version, for update_node() (writer thread only)
+        self.rid_classes = {}       # rid -> class name
+
+    def find_rid(self, class_name):
+        node = self.helper.get_nodes_by_type(class_name)[0]
+        self.versions[node._rid] = node._version
+        self.rid_classes[node._rid] = class_name
+        return node._rid
+
+    def read(self, rids):
+        records = {r._rid: r for r in self.helper.run_query(records_sql, rids)}
+        return [records[rid] for rid in rids]
+
+    def write(self, rid, properties):
+        try:
+            self.writer_helper.update_node(rid, properties, version=self.versions[rid], transaction=True)
+        except Exception:
+            # Most likely a version conflict (someone else updated the node): refresh the version and retry once
+            self.versions[rid] = self.writer_helper.get_nodes_by_type(self.rid_classes[rid])[0]._version
+            self.writer_helper.update_node(rid, properties, version=self.versions[rid], transaction=True)
+        self.versions[rid] += 1
+
+
+def records_sql(rids):
+    # One query for several records by record ID
+    return "SELECT FROM [{}]".format(", ".join(rids))
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class InMemoryBackend:
+    """In-process stand-in for an OrientDB database, for running and testing --database mode without a server.
+
+    Nodes are SimpleNamespaces with _rid, _version and one attribute per property.  read() returns copies, as a
+    server would.  reads and writes count the requests made, i.e. the round trips a server would have seen.
+    """
+
+    def __init__(self):
+        self.nodes = {}             # rid -> node
+        self.reads = 0
+        self.writes = 0
+        self.lock = threading.Lock()
+
+    def create_node(self, class_name, properties):
+        with self.lock:
+            rid = "#{}:0".format(len(self.nodes) + 1)
+            self.nodes[rid] = SimpleNamespace(_rid=rid, _version=1, _class=class_name, **copy.deepcopy(properties))
+            return rid
+
+    def get_node(self, rid):
+        with self.lock:
+            return copy.deepcopy(self.nodes[rid])
+
+    def find_rid(self, class_name):
+        with self.lock:
+            self.reads += 1
+            for rid, node in self.nodes.items():
+                if node._class == class_name:
+                    return rid
+        raise IndexError("No '{}' node in the database".format(class_name))
+
+    def read(self, rids):
+        with self.lock:
+            self.reads += 1
+            return [copy.deepcopy(self.nodes[rid]) for rid in rids]
+
+    def write(self, rid, properties):
+        with self.lock:
+            self.writes += 1
+            node = self.nodes[rid]
+            for name, value in properties.items():
+                setattr(node, name, copy.deepcopy(value))
+            node._version += 1
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class DatabaseExchange:
+    """Epoch-by-epoch exchange with the Radio Queue database nodes.
+
+    read_inputs() returns the Radio_Input and Radio_Control lists in one backend read.  publish_queues() hands the
+    Radio_Queues list to a background writer thread and returns at once; if the writer is still busy with an
+    earlier update, the pending update is replaced (coalesced), so only the latest queue state is ever written.
+    An error in the writer is raised by the next publish_queues() call.
+    """
+
+    def __init__(self, backend, input_class='Radio_Input', control_class='Radio_Control', queues_class='Radio_Queues',
+                 input_property='Input_Rate', control_property='BW_Allocs', queues_property='Radio_Queues'):
+        self.backend = backend
+        self.input_class = input_class
+        self.control_class = control_class
+        self.queues_class = queues_class
+        self.input_property = input_property
+        self.control_property = control_property
+        self.queues_property = queues_property
+        self.rids = None            # (input rid, control rid, queues rid)
+        self.lookup_rids()          # before the writer thread starts, so only one thread ever looks them up
+
+        self.pending = None         # latest Radio_Queues list not yet written
+        self.writes = 0
+        self.coalesced = 0          # updates replaced by a newer one before they were written
+        self.error = None
+        self.closing = False
+        self.cond = threading.Condition()
+        self.writer = threading.Thread(target=self.write_loop, name='RadioQueue-db-writer', daemon=True)
+        self.writer.start()
+
+    def lookup_rids(self):
+        if self.rids is None:
+            self.rids = (self.backend.find_rid(self.input_class),
+                         self.backend.find_rid(self.control_class),
+                         self.backend.find_rid(self.queues_class))
+        return self.rids
+
+    def read_inputs(self):
+        # returns (list of Radio data input rate dictionaries, list of Radio bandwidth allocation dictionaries)
+        input_rid, control_rid, queues_rid = self.lookup_rids()
+        radio_input, radio_control = self.backend.read([input_rid, control_rid])
+        return getattr(radio_input, self.input_property), getattr(radio_control, self.control_property)
+
+    def publish_queues(self, queues):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        with self.cond:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = queues
+            self.cond.notify()
+
+    def write_loop(self):
+        while True:
+            with self.cond:
+                while self.pending is None and not self.closing:
+                    self.cond.wait()
+                if self.pending is None:
+                    return                      # closing, and nothing left to write
+                queues, self.pending = self.pending, None
+            try:
+                queues_rid = self.lookup_rids()[2]
+                self.backend.write(queues_rid, {self.queues_property: queues})
+                self.writes += 1
+            except Exception as e:
+                self.error = e
+
+    def close(self, timeout=5.0):
+        # Writes any pending update, then stops the writer thread
+        with self.cond:
+            self.closing = True
+            self.cond.notify()
+        self.writer.join(timeout)
@@ -0,0 +1,123 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---          Realtime Epoch Scheduler for the Radio Queue Status Display   ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Runs one epoch per period against absolute deadlines on the monotonic  ---
+# --- clock, so time spent running an epoch is not added to the schedule,    ---
+# --- and keeps account of late starts, processing time and missed          ---
+# --- deadlines.                                                             ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+import time
+import bisect
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class EpochScheduler:
+    """Calls step() once per period, epoch k being released at start + k * period.
+
+    An epoch overruns when it finishes after its deadline (the next epoch's release time).  If the schedule has
+    fallen behind, the catch-up policy decides what happens to the releases that have already passed:
+        'burst':    run the missed epochs back-to-back until the schedule has caught up (simulated time stays
+                    locked to wall-clock time)
+        'skip':     drop the missed releases and wait for the next one (stays on the original time grid, but the
+                    simulation runs fewer epochs than wall-clock time)
+        'stretch':  start the next epoch now and shift the rest of the schedule back (the previous behavior of
+                    RadioQueue: missed time is never made up)
+
+    release is the index, on the original time grid, of the epoch being run: it counts the releases dropped by
+    'skip' and the time shifted by 'stretch', so that release * period is the wall-clock time since the start.
+
+    For every epoch the start jitter (how late it started after its release) and the processing latency (how long
+    step() took) are counted in histograms; report() summarizes them.
+    """
+
+    POLICIES = ('burst', 'skip', 'stretch')
+    HIST_EDGES_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 1000)    # upper bin edges; the last bin is > 1 s
+
+    def __init__(self, period_sec, policy='burst', clock=time.monotonic):
+        if policy not in self.POLICIES:
+            raise ValueError("Unknown catch-up policy '{}': use one of {}".format(policy, ', '.join(self.POLICIES)))
+        self.period = period_sec
+        self.policy = policy
+        self.clock = clock
+
+        self.epochs = 0                 # epochs run
+        self.release = 0                # index of the current epoch's release time on the original time grid
+        self.overruns = 0               # epochs that finished after their deadline
+        self.skipped = 0                # releases dropped by the 'skip' policy
+        self.rebased = 0                # times the 'stretch' policy shifted the schedule
+        self.max_jitter = 0.0           # seconds
+        self.max_latency = 0.0          # seconds
+        self.total_latency = 0.0        # seconds
+        self.jitter_hist = [0] * (len(self.HIST_EDGES_MS) + 1)
+        self.latency_hist = [0] * (len(self.HIST_EDGES_MS) + 1)
+
+    def run(self, step, stop_event):
+        """Runs step() on schedule until stop_event is set."""
+        start = self.clock()
+        origin = start
+        k = 0
+        while not stop_event.is_set():
+            release = start + (k * self.period)
+            remaining = release - self.clock()
+            if remaining > 0:
+                if stop_event.wait(remaining):
+                    break
+
+            self.release = int(round((release - origin) / self.period))
+            t0 = self.clock()
+            step()
+            t1 = self.clock()
+            self.record(t0 - release, t1 - t0, t1 > (release + self.period))
+            k += 1
+
+            behind = t1 - (start + (k * self.period))   # > 0: the next release has already passed
+            if behind > 0:
+                if self.policy == 'skip':
+                    missed = int(behind // self.period) + 1
+                    self.skipped += missed
+                    k += missed
+                elif self.policy == 'stretch':
+                    start += behind
+                    self.rebased += 1
+
+    def record(self, jitter, latency, overrun):
+        self.epochs += 1
+        self.overruns += int(overrun)
+        self.max_jitter = max(self.max_jitter, jitter)
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+        self.jitter_hist[bisect.bisect_left(self.HIST_EDGES_MS, jitter * 1000)] += 1
+        self.latency_hist[bisect.bisect_left(self.HIST_EDGES_MS, latency * 1000)] += 1
+
+    def report(self):
+        """Returns a text summary of the schedule: deadline misses, and start jitter and latency histograms."""
+        lines = ["Epoch Schedule: {0} epochs of {1:g} ms, catch-up policy '{2}'".format(
+                     self.epochs, self.period * 1000, self.policy),
+                 "  Deadline misses: {0} ({1:.2f}%)   Skipped epochs: {2}   Schedule shifts: {3}".format(
+                     self.overruns, (100.0 * self.overruns / self.epochs) if self.epochs else 0.0,
+                     self.skipped, self.rebased),
+                 "  Processing latency: {0:.3f} ms mean, {1:.3f} ms max   Start jitter: {2:.3f} ms max".format(
+                     (1000 * self.total_latency / self.epochs) if self.epochs else 0.0,
+                     1000 * self.max_latency, 1000 * self.max_jitter),
+                 "  {0:>14} | {1:>10} | {2:>10}".format("Bin (ms)", "Jitter", "Latency")]
+        lower = 0
+        for idx, upper in enumerate(self.HIST_EDGES_MS + (None,)):
+            if upper is None:
+                label = "> {0:g}".format(lower)
+            else:
+                label = "{0:g} - {1:g}".format(lower, upper)
+                lower = upper
+            if self.jitter_hist[idx] or self.latency_hist[idx]:
+                lines.append("  {0:>14} | {1:>10d} | {2:>10d}".format(label, self.jitter_hist[idx],
+                                                                      self.latency_hist[idx]))
+        return "\n".join(lines)
@@ -2,16 +2,41 @@
 # ------------------------------------------------------------------------------
 # ---      Scenario File Generator for Data Rate Input Generator             ---
 # ---                                                                        ---
-# --- Last Updated: April 22, 2019                                           ---
+# --- Last Updated: October 18, 2026                                         ---
 # ------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------
 
 import os
+import sys
 import argparse
-import csv
 import json
 from shutil import copyfile
 import shutil
+from scenario_timeline import load_rate_timeline, save_timeline
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+def time_to_filename(t):
+    # 30.0 -> '30.json' (datarate_updater.py expects whole-second file names)
+    if float(t).is_integer():
+        return "{}.json".format(int(t))
+    return "{}.json".format(t)
+
+
+# ------------------------------------------------------------------------------
+
+
+def write_test_dir(timeline, test_dir, csv_file):
+    # Writes one JSON file per time in the scenario, each exactly once
+    os.mkdir(test_dir)
+    copyfile(csv_file, os.path.join(test_dir, os.path.basename(csv_file)))  # A copy of the CSV File, as an FYI
+
+    for t, rate_data in timeline.entries:
+        with open(os.path.join(test_dir, time_to_filename(t)), 'w') as jf:
+            json.dump(rate_data, jf, indent=4)
 
 
 # ------------------------------------------------------------------------------
@@ -23,70 +48,56 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('-f', action='store', dest='csv_file', required=True, type=str,
                         help='CSV file of the data rates for the scenario.')
-    parser.add_argument('-T', action='store', dest='test_dir', required=True, type=str,
+    parser.add_argument('-T', action='store', dest='test_dir', default=None, type=str,
                         help='The test directory to store the collection of JSON files that define the radio '
                              'data input rates for the test.  Files are named according to the time that they should '
                              'be applied to the simulation (e.g. 30.json, 45.json, 100.json, etc.)')
-    parser.add_argument('-v', '--version', action='version', version='%(prog)s 0.0.1')
+    parser.add_argument('-o', action='store', dest='timeline_file', default=None, type=str,
+                        help='Also (or instead of -T) write the scenario as one compact timeline JSON file, which '
+                             'RadioQueue.py can read with -S or --batch')
+    parser.add_argument('--force', action='store_true', default=False, dest='force',
+                        help='Replace the test directory and its contents if it already exists')
+    parser.add_argument('-v', '--version', action='version', version='%(prog)s 0.1.0')
 
     cli_args = parser.parse_args()
 
     # CLI argument assignments
     csv_file = cli_args.csv_file
     test_dir = cli_args.test_dir
+    timeline_file = cli_args.timeline_file
+
+    if test_dir is None and timeline_file is None:
+        parser.error("nothing to write: use -T TEST_DIR and/or -o TIMELINE_FILE")
 
-    # Check to see if the Test Directory exists.  If so, prompt the user to see if they want to let it
-    # be overwritten or not.  If not, the program exits.
-    if os.path.isdir(test_dir):
-        while True:
-            choice = input("\n  Test Directory already exists.  Replace it and all of its contents? (Y|N)  ")
-            if (choice == 'N') or (choice == 'n') or (choice == "No") or (choice == "no"):
-                print("    Good idea.  Test Directory remains unmodified.  Exiting.")
-                exit(0)
-            elif (choice == 'Y') or (choice == 'y') or (choice == "Yes") or (choice == "yes"):
-                print("    OK.  Preparing the bit laser...", end='')
-                shutil.rmtree(test_dir)
-                print("Done!")
-                break
-            else:
-                print("    Sorry, that response didn't compute.  Please enter 'Y' or 'N'.")
-        
-    os.mkdir(test_dir)
-    copyfile(csv_file, test_dir + '/' + csv_file)       # Put a copy of the CSV File into the target directory as an FYI
-    
     # Check to see if the CSV file exists.  If it does not, flag user, and then exit.
     if os.path.isfile(csv_file) is False:
         print("  CSV file '{}' does not exist.  Exiting.".format(csv_file))
-        exit(-1)
-    
-    # Open CSV file, and build the data rate scenario files from it.
+        sys.exit(-1)
+
+    # Check to see if the Test Directory exists.  It is only replaced when --force is given.
+    if test_dir is not None and os.path.isdir(test_dir):
+        if not cli_args.force:
+            print("  Test Directory '{}' already exists.  Use --force to replace it and all of its contents.  "
+                  "Exiting.".format(test_dir))
+            sys.exit(-1)
+
+    # Read the whole CSV file once, grouping its rows by time in memory
     print("  Reading CSV data...")
-    with open(csv_file) as f:
-        csv_data = csv.reader(f, delimiter=',')
-        for row in csv_data:
-            time = row[0]
-            name = row[1].lstrip()
-            bitrate = row[2]
-            burstiness = row[3]
-            value_tx = row[4]
-            
-            rate_data = []
-            
-            # Check to see if JSON file exists.  If so, load the rate_data list.
-            json_file = test_dir + '/' + str(time) + '.json'
-            if os.path.isfile(json_file):
-                with open(json_file, 'r') as jf:
-                    rate_data = json.load(jf)
-            
-            # Add new data (e.g. row from CSV file) to the rate_data list
-            rate_data.append({"RadioName": name,
-                              "DataInRate-bps": int(bitrate),
-                              "Burstiness": float(burstiness),
-                              "ValuePerKbTx": float(value_tx)})
-                                  
-            # Write the rate_data list to the JSON file
-            with open(json_file, 'w') as jf:
-                json.dump(rate_data, jf, indent=4)
-            
-    print("    Done!.")
-    print("  Data Rate files for the test scenario are found here: {}".format(test_dir))
+    try:
+        timeline = load_rate_timeline(csv_file)
+    except (ValueError, IndexError) as e:
+        print("  CSV file '{}' has a malformed row ({}).  Exiting.".format(csv_file, e))
+        sys.exit(-1)
+
+    if test_dir is not None:
+        if os.path.isdir(test_dir):
+            shutil.rmtree(test_dir)
+        write_test_dir(timeline, test_dir, csv_file)
+    if timeline_file is not None:
+        save_timeline(timeline, timeline_file)
+
+    print("    Done!  {} test conditions.".format(len(timeline)))
+    if test_dir is not None:
+        print("  Data Rate files for the test scenario are found here: {}".format(test_dir))
+    if timeline_file is not None:
+        print("  Data Rate timeline for the test scenario: {}".format(timeline_file))
@@ -0,0 +1,151 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---          Input File Watcher for the Radio Queue Status Display         ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Caches the parsed contents of a JSON input file (e.g. the -i data      ---
+# --- input rates or -b bandwidth allocations) and only re-parses it when    ---
+# --- the file changes.  On Linux, inotify events tell us when the file has  ---
+# --- been rewritten; elsewhere (or if inotify is unavailable) the file's    ---
+# --- modification time, size and inode are checked every call instead.     ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import struct
+import ctypes
+import ctypes.util
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class Inotify:
+    """Minimal non-blocking inotify watch on one directory, via ctypes (Linux only)."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+
+    EVENT = struct.Struct('iIII')   # wd, mask, cookie, len (followed by len bytes of file name)
+
+    def __init__(self, directory, mask):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err))
+
+    def read_events(self):
+        # returns a list of (mask, file name) for the events queued since the last call
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(buf):
+                wd, mask, cookie, name_len = self.EVENT.unpack_from(buf, offset)
+                offset += self.EVENT.size
+                name = os.fsdecode(buf[offset:offset + name_len].rstrip(b'\0'))
+                offset += name_len
+                events.append((mask, name))
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class InputFileWatcher:
+    """Returns the parsed contents of an input file, re-parsing it only when it has changed.
+
+    get() re-parses the file when an inotify event for it has arrived (Linux), or when its (mtime, size, inode)
+    signature has changed (all other platforms, or when use_inotify is False).  If the file is part way through
+    being rewritten and fails to parse, the last good contents are returned and the file is re-read on the next
+    call.  version counts the number of times the file has been (successfully) parsed.
+    """
+
+    WATCH_MASK = (Inotify.IN_CLOSE_WRITE | Inotify.IN_MOVED_TO | Inotify.IN_CREATE | Inotify.IN_DELETE |
+                  Inotify.IN_MOVED_FROM | Inotify.IN_DELETE_SELF | Inotify.IN_MOVE_SELF)
+
+    def __init__(self, path, parse=json.load, use_inotify=True):
+        self.path = path
+        self.parse = parse
+        self.name = os.path.basename(path)
+        self.contents = None
+        self.signature = None
+        self.version = 0
+        self.stale = True
+        self.inotify = None
+
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self.inotify = Inotify(os.path.dirname(os.path.abspath(path)), self.WATCH_MASK)
+            except (OSError, AttributeError):
+                self.inotify = None       # e.g. out of inotify watches: fall back to checking the file signature
+
+    def get(self):
+        if self.inotify is not None:
+            for mask, name in self.inotify.read_events():
+                if name == self.name or (mask & (Inotify.IN_Q_OVERFLOW | Inotify.IN_DELETE_SELF |
+                                                 Inotify.IN_MOVE_SELF | Inotify.IN_IGNORED)):
+                    self.stale = True
+            if self.stale:
+                self.reload()
+        else:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                if self.contents is None:
+                    raise
+                return self.contents      # the writer may have removed the file to replace it
+            signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+            if self.stale or signature != self.signature:
+                self.signature = signature
+                self.reload()
+        return self.contents
+
+    def reload(self):
+        try:
+            with open(self.path, 'r') as f:
+                contents = self.parse(f)
+        except (ValueError, OSError):
+            # json.JSONDecodeError is a ValueError.  The writer may be part way through rewriting the file.
+            if self.contents is None:
+                raise
+            self.stale = True
+            return
+        self.contents = contents
+        self.version += 1
+        self.stale = False
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
@@ -0,0 +1,141 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---          Queue Latency Tracking for the Radio Queue Status Display     ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Follows the contents of each radio queue as a FIFO of (arrival epoch,  ---
+# --- bytes) segments, one segment per epoch of arrivals, so that every      ---
+# --- epoch's drain yields the queueing delay (sojourn time) of the bytes it ---
+# --- sent.  The cost is proportional to the number of segments touched,     ---
+# --- not to the number of bytes queued or sent.                             ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+from collections import deque
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class SojournTracker:
+    """One FIFO queue, as a deque of [arrival epoch, bytes] segments (oldest first)."""
+
+    def __init__(self):
+        self.segments = deque()
+        self.total = 0.0            # bytes in the queue
+
+    def update(self, epoch, arrived, served, q_len, sent):
+        """Adds the epoch's arrivals, takes the served bytes from the head, and appends (delay in epochs, bytes) of
+        what was sent to the sent list.
+
+        q_len is the queue length the queue model ended the epoch with.  The tracker is brought into line with it
+        from the tail: bytes the model dropped at the queue size limit (or lost to rounding) are taken off the
+        newest segments, and bytes it has in excess are added to the newest segment.
+        """
+        segments = self.segments
+        if arrived > 0:
+            segments.append([epoch, arrived])
+            self.total += arrived
+
+        while (served > 0) and segments:
+            head = segments[0]
+            if head[1] <= served:
+                segments.popleft()
+                sent.append((epoch - head[0], head[1]))
+                served -= head[1]
+                self.total -= head[1]
+            else:
+                head[1] -= served
+                sent.append((epoch - head[0], served))
+                self.total -= served
+                served = 0
+
+        excess = self.total - q_len
+        while (excess > 0) and segments:
+            tail = segments[-1]
+            if tail[1] <= excess:
+                segments.pop()
+                excess -= tail[1]
+            else:
+                tail[1] -= excess
+                excess = 0
+        if excess < 0:
+            if segments:
+                segments[-1][1] -= excess
+            else:
+                segments.append([epoch, -excess])
+        self.total = float(q_len)
+
+    def clear(self):
+        self.segments.clear()
+        self.total = 0.0
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class RadioLatency:
+    """Sojourn times of the bytes a radio sent over a sliding window of epochs.
+
+    A radio has one SojournTracker per queue (one, or one per DSCP class queue).  The bytes sent in the last window
+    epochs are kept as a byte-weighted histogram of delay in epochs, so percentiles() is a sort of the distinct
+    delays in the window.
+    """
+
+    def __init__(self, window, num_queues=1):
+        self.queues = [SojournTracker() for _ in range(num_queues)]
+        self.window = deque(maxlen=window)      # per epoch: list of (delay in epochs, bytes)
+        self.hist = {}                          # delay in epochs -> bytes sent in the window
+        self.cached = None                      # (percentiles asked for, result), until the next update()
+
+    def update(self, epoch, arrived, served, q_len):
+        """Runs one epoch; arrived, served and q_len hold one value (bytes) per queue."""
+        sent = []
+        for tracker, a, s, q in zip(self.queues, arrived, served, q_len):
+            tracker.update(epoch, a, s, q, sent)
+
+        hist = self.hist
+        if len(self.window) == self.window.maxlen:
+            for delay, num_bytes in self.window[0]:
+                left = hist.get(delay, 0.0) - num_bytes
+                if left > 1e-9:
+                    hist[delay] = left
+                else:
+                    hist.pop(delay, None)
+        self.window.append(sent)
+        for delay, num_bytes in sent:
+            hist[delay] = hist.get(delay, 0.0) + num_bytes
+        self.cached = None
+
+    def percentiles(self, pcts=(50, 95, 99)):
+        """Byte-weighted percentiles of the delay (in epochs) of the bytes sent in the window (None if none were)."""
+        if (self.cached is not None) and (self.cached[0] == pcts):
+            return self.cached[1]
+        result = None
+        total = sum(self.hist.values())
+        if total > 0:
+            delays = sorted(self.hist.items())
+            result = []
+            cum = 0.0
+            i = 0
+            for pct in pcts:
+                target = total * (pct / 100)
+                while (i < len(delays) - 1) and (cum + delays[i][1] < target):
+                    cum += delays[i][1]
+                    i += 1
+                result.append(delays[i][0])
+            result = tuple(result)
+        self.cached = (pcts, result)
+        return result
+
+    def clear(self):
+        for tracker in self.queues:
+            tracker.clear()
+        self.window.clear()
+        self.hist.clear()
+        self.cached = None
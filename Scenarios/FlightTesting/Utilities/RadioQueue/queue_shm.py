@@ -0,0 +1,128 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---       Shared-Memory Queue Snapshot for the Radio Queue Status Display  ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Mirrors the radio_queues.json contents (queue length, epoch value and  ---
+# --- online flag of each radio) into a fixed-layout shared memory segment,  ---
+# --- so that programs on the same host can read the latest epoch without    ---
+# --- any file I/O or parsing.  A sequence counter (seqlock) lets readers    ---
+# --- detect, and retry, a snapshot that was being written as they read it.  ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+#
+# Segment layout (little-endian):
+#   header (40 bytes):  magic b'RQSHM001', format version (u32), max radios (u32), sequence (u64),
+#                       epoch count (u64), number of radios (u32), radio name field size (u32)
+#   radio records (56 bytes each, max radios of them):
+#                       radio name (32 bytes, UTF-8, NUL padded), QLen (i64), CurrentEpochValue (f64),
+#                       IsOnline (u8), padding (7 bytes)
+#
+# The sequence is odd while a snapshot is being written and even when it is complete.  To read: read the sequence,
+# and retry if it is odd; copy the header and records; read the sequence again, and retry if it has changed.
+
+import math
+import struct
+import time
+from multiprocessing import shared_memory
+
+
+MAGIC = b'RQSHM001'
+VERSION = 1
+NAME_SIZE = 32
+HEADER = struct.Struct('<8sIIQQII')
+RECORD = struct.Struct('<{}sqdB7x'.format(NAME_SIZE))
+SEQ_OFFSET = 16                     # offset of the sequence counter in the header
+SEQ = struct.Struct('<Q')
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class QueueSharedMemoryWriter:
+    """Creates the shared memory segment and publishes a snapshot of the Radios each epoch."""
+
+    def __init__(self, name, max_radios=256):
+        self.name = name
+        self.max_radios = max_radios
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER.size + (max_radios * RECORD.size))
+        self.buf = self.shm.buf
+        self.seq = 0
+        HEADER.pack_into(self.buf, 0, MAGIC, VERSION, max_radios, self.seq, 0, 0, NAME_SIZE)
+
+    def publish(self, epoch_num, radios):
+        # Radios beyond max_radios are left out of the snapshot
+        radios = radios[:self.max_radios]
+        records = b''.join([RECORD.pack(encode_name(r.name), int(math.ceil(r.q_len / 8)),
+                                        r.current_epoch_value, 1 if r.online else 0) for r in radios])
+
+        self.seq += 1                                   # odd: snapshot being written
+        SEQ.pack_into(self.buf, SEQ_OFFSET, self.seq)
+        HEADER.pack_into(self.buf, 0, MAGIC, VERSION, self.max_radios, self.seq, epoch_num, len(radios), NAME_SIZE)
+        self.buf[HEADER.size:HEADER.size + len(records)] = records
+        self.seq += 1                                   # even: snapshot complete
+        SEQ.pack_into(self.buf, SEQ_OFFSET, self.seq)
+
+    def close(self):
+        if self.shm is not None:
+            self.buf = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+def encode_name(name):
+    # UTF-8 name of at most NAME_SIZE bytes, cut on a character boundary so that readers can decode it
+    return name.encode('utf-8')[:NAME_SIZE].decode('utf-8', 'ignore').encode('utf-8')
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class QueueSharedMemoryReader:
+    """Attaches to a segment created by QueueSharedMemoryWriter (e.g. in a link manager process)."""
+
+    def __init__(self, name):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)   # Python 3.13+
+        except TypeError:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Before Python 3.13, the resource tracker would unlink the writer's segment when this process exits
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        magic, version = struct.unpack_from('<8sI', self.shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.shm.close()
+            raise ValueError("'{}' is not a Radio Queue shared memory segment".format(name))
+
+    def read(self, timeout=1.0):
+        """Returns (epoch count, list of (radio name, QLen, CurrentEpochValue, IsOnline)) for the latest epoch."""
+        buf = self.shm.buf
+        deadline = time.monotonic() + timeout
+        while True:
+            seq1 = SEQ.unpack_from(buf, SEQ_OFFSET)[0]
+            if not (seq1 & 1):
+                header = bytes(buf[:HEADER.size])
+                num_radios = HEADER.unpack(header)[5]
+                records = bytes(buf[HEADER.size:HEADER.size + (num_radios * RECORD.size)])
+                if SEQ.unpack_from(buf, SEQ_OFFSET)[0] == seq1:
+                    break
+            if time.monotonic() > deadline:
+                raise TimeoutError("Timed out waiting for a complete Radio Queue snapshot")
+
+        epoch_num = HEADER.unpack(header)[4]
+        radios = [(name.rstrip(b'\0').decode('utf-8'), q_len, epoch_value, bool(online))
+                  for name, q_len, epoch_value, online in RECORD.iter_unpack(records)]
+        return epoch_num, radios
+
+    def close(self):
+        self.shm.close()
@@ -0,0 +1,242 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---        Vectorized Epoch Engine for the Radio Queue Status Display      ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Keeps the state of every simulated radio as parallel NumPy arrays      ---
+# --- (struct-of-arrays) so that an epoch update of the whole fleet is a     ---
+# --- handful of array operations instead of a Python loop over Radios.      ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+import numpy as np
+
+from class_queues import update_class_queues
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class RadioView:
+    """Radio-compatible view onto one row of a VectorEpochEngine.
+
+    Exposes the same attributes and methods as RadioQueue.Radio, so the input merging code and the curses panels
+    can use it unchanged.  Reads and writes go straight to the engine's arrays.
+    """
+
+    __slots__ = ('engine', 'idx', 'name')
+
+    def __init__(self, engine, idx, name):
+        self.engine = engine
+        self.idx = idx
+        self.name = name
+
+    def _array_field(field):
+        return property(lambda self: float(getattr(self.engine, field)[self.idx]),
+                        lambda self, value: getattr(self.engine, field).__setitem__(self.idx, value))
+
+    din_bps = _array_field('din_bps')
+    dout_bps = _array_field('dout_bps')
+    inburst_factor = _array_field('inburst_factor')
+    burst_din_bps = _array_field('burst_din_bps')
+    value_per_kb_tx = _array_field('value_per_kb_tx')
+    current_epoch_value = _array_field('current_epoch_value')
+    q_delta_bps = _array_field('q_delta_bps')
+
+    del _array_field
+
+    @property
+    def q_len(self):
+        return int(self.engine.q_len[self.idx])
+
+    @q_len.setter
+    def q_len(self, value):
+        self.engine.q_len[self.idx] = value
+
+    @property
+    def online(self):
+        return bool(self.engine.online[self.idx])
+
+    @online.setter
+    def online(self, value):
+        self.engine.online[self.idx] = value
+
+    @property
+    def traffic(self):
+        return self.engine.models.get(self.idx)
+
+    @traffic.setter
+    def traffic(self, model):
+        if model is None:
+            self.engine.models.pop(self.idx, None)
+        else:
+            self.engine.models[self.idx] = model
+
+    @property
+    def classes(self):
+        return self.engine.classes.get(self.idx)
+
+    @classes.setter
+    def classes(self, class_queues):
+        if class_queues is None:
+            self.engine.classes.pop(self.idx, None)
+        else:
+            self.engine.classes[self.idx] = class_queues
+
+    @property
+    def epochs_per_sec(self):
+        return self.engine.epochs_per_sec
+
+    @epochs_per_sec.setter
+    def epochs_per_sec(self, value):
+        self.engine.epochs_per_sec = value
+
+    def update_q(self):
+        self.engine.update_queues(np.arange(self.idx, self.idx + 1))
+
+    def go_offline(self):
+        self.engine.go_offline(self.idx)
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class VectorEpochEngine:
+    """Struct-of-arrays radio state with a batched epoch update.
+
+    update_queues() applies the same queue model as RadioQueue.Radio.update_q() to every online radio at once, and
+    bw_totals() reduces the allocated and utilized bandwidth of the fleet without a Python loop.
+    """
+
+    INITIAL_CAPACITY = 16
+
+    def __init__(self, epochs_per_sec, max_queue_size_bytes, enforce_max_q_size, seed=None):
+        self.epochs_per_sec = epochs_per_sec
+        self.max_queue_size_bytes = max_queue_size_bytes
+        self.enforce_max_q_size = enforce_max_q_size
+        self.rng = np.random.default_rng(seed)
+        self.names = []
+        self.views = []
+        self.models = {}            # radio index -> TrafficModel, for radios that have one (see traffic_models.py)
+        self.classes = {}           # radio index -> ClassQueues, for radios that have them (see class_queues.py)
+        self.n = 0
+
+        capacity = self.INITIAL_CAPACITY
+        self.din_bps = np.zeros(capacity)               # bits per second
+        self.dout_bps = np.zeros(capacity)              # bits per second
+        self.inburst_factor = np.zeros(capacity)        # deviation from input value
+        self.burst_din_bps = np.zeros(capacity)         # actual data input rate in bits per second
+        self.value_per_kb_tx = np.zeros(capacity)       # points earned for each KB transmitted
+        self.current_epoch_value = np.zeros(capacity)   # value of transmitted kbits from last epoch
+        self.q_delta_bps = np.zeros(capacity)           # bits per second
+        self.q_len = np.zeros(capacity, dtype=np.int64)  # bytes
+        self.online = np.zeros(capacity, dtype=bool)    # status: True: online, False: offline
+
+    _fields = ('din_bps', 'dout_bps', 'inburst_factor', 'burst_din_bps', 'value_per_kb_tx', 'current_epoch_value',
+               'q_delta_bps', 'q_len', 'online')
+
+    def add_radio(self, name):
+        """Append a radio to the engine and return its RadioView."""
+        if self.n == len(self.q_len):
+            for field in self._fields:
+                old = getattr(self, field)
+                new = np.zeros(len(old) * 2, dtype=old.dtype)
+                new[:self.n] = old[:self.n]
+                setattr(self, field, new)
+        idx = self.n
+        self.n += 1
+        self.online[idx] = True
+        view = RadioView(self, idx, name)
+        self.names.append(name)
+        self.views.append(view)
+        return view
+
+    def go_offline(self, idx):
+        for field in self._fields:
+            getattr(self, field)[idx] = 0
+        if idx in self.classes:
+            self.classes[idx].clear()
+
+    @staticmethod
+    def _positions(idx, radios):
+        # returns (positions in idx, radio indices) of the radios (dictionary keys) that are in idx
+        radio_idx = np.fromiter(radios.keys(), dtype=np.intp, count=len(radios))
+        pos = np.searchsorted(idx, radio_idx)
+        found = pos < len(idx)
+        found[found] = idx[pos[found]] == radio_idx[found]
+        return pos[found], radio_idx[found]
+
+    def update_queues(self, idx=None):
+        """Run one epoch of the queue model for all online radios (or for the radios in idx)."""
+        if idx is None:
+            idx = np.flatnonzero(self.online[:self.n])
+        else:
+            idx = idx[self.online[idx]]
+        if len(idx) == 0:
+            return
+
+        eps = self.epochs_per_sec
+        din = self.din_bps[idx]
+        dout = self.dout_bps[idx]
+        value_per_kb_tx = self.value_per_kb_tx[idx]
+        inburst = self.inburst_factor[idx]
+        q_len = self.q_len[idx]
+
+        burst_din = din * (1 + self.rng.uniform(-inburst, inburst))
+        if self.models:
+            # Radios with a traffic model: each model hands out the next value of its pre-generated block
+            pos, model_idx = self._positions(idx, self.models)
+            for p, i in zip(pos.tolist(), model_idx.tolist()):
+                burst_din[p] = self.models[i].next(float(din[p]))
+        q_delta = burst_din - dout
+        grow = q_delta > 0
+        shrink = q_delta < 0
+
+        # Queue growth, clamped to the space left in the queue when the MAX_QUEUE_SIZE_BYTES limit is enforced
+        q_grow = np.ceil(q_delta / eps / 8).astype(np.int64)
+        if self.enforce_max_q_size:
+            q_bytes_remaining = self.max_queue_size_bytes - q_len
+            q_grow = np.where(q_grow > q_bytes_remaining, np.maximum(q_bytes_remaining, 0), q_grow)
+
+        # Queue drain: either the queue empties this epoch, or shrinks by the drain amount
+        q_drain = -np.floor(q_delta / eps / 8).astype(np.int64)
+        emptied = shrink & (q_len <= q_drain)
+
+        epoch_value = ((dout / eps) / 1000) * value_per_kb_tx
+        emptied_value = (((din / eps) / 1000) + ((q_len * 8) / 1000)) * value_per_kb_tx
+        epoch_value = np.where(emptied, emptied_value, epoch_value)
+
+        q_len = np.where(grow, q_len + q_grow, q_len)
+        q_len = np.where(shrink, np.where(emptied, 0, q_len - q_drain), q_len)
+
+        if self.classes:
+            # Radios with DSCP class queues: all of them are drained together, one array operation per scheduler
+            pos, class_idx = self._positions(idx, self.classes)
+            if len(pos):
+                q_len[pos], epoch_value[pos], value_per_kb_tx = update_class_queues(
+                    [self.classes[i] for i in class_idx.tolist()], burst_din[pos], dout[pos], eps,
+                    self.max_queue_size_bytes if self.enforce_max_q_size else None)
+                self.value_per_kb_tx[class_idx] = value_per_kb_tx
+
+        self.burst_din_bps[idx] = burst_din
+        self.q_delta_bps[idx] = q_delta
+        self.current_epoch_value[idx] = epoch_value
+        self.q_len[idx] = q_len
+
+    def bw_totals(self):
+        """Return (total bandwidth allocated in bps, total bandwidth utilized in Mbps) across all radios."""
+        n = self.n
+        epoch_value = self.current_epoch_value[:n]
+        utilized = np.divide(epoch_value, self.value_per_kb_tx[:n], out=np.zeros(n), where=(epoch_value != 0))
+        total_bw_allocated = float(self.dout_bps[:n].sum())
+        total_bw_utilized = float(utilized.sum() * self.epochs_per_sec / 1000)
+        return total_bw_allocated, total_bw_utilized
+
+    def columns(self, fields):
+        """Return a copy of each of the named fields for all radios, as Python lists."""
+        return [getattr(self, field)[:self.n].tolist() for field in fields]
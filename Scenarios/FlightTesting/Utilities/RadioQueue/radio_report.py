@@ -0,0 +1,227 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---         Radio Report Log Writers for the Radio Queue Status Display    ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Long-lived writers for the per-epoch Radio Report logs.  The log file  ---
+# --- is opened once for the whole run and rows are buffered, so the cost of ---
+# --- logging an epoch does not grow with the length of the run.  Logs are   ---
+# --- either CSV text, or fixed-width binary records that can be loaded with ---
+# --- a NumPy memmap (see load_radio_history()).                             ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+import os
+import csv
+import time
+import struct
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class RadioReportWriter:
+    """Appends Radio Report rows (one per radio per epoch) to a CSV log file.
+
+    The file is opened and the header written once.  Rows are buffered and flushed to disk every flush_rows rows
+    or every flush_sec seconds, whichever comes first, and when the writer is closed.
+    """
+
+    HEADER = ["Radio Name",
+              "Time",
+              "Epochs per Second",
+              "Epoch Count",
+              "Radio Status",
+              "Queue Length (bytes)",
+              "Data Input Rate (b/s)",
+              "Data Output Rate (b/s)",
+              "Epoch Value",
+              "Value per kb Tx"]
+    LATENCY_HEADER = ["Sojourn p50 (ms)",
+                      "Sojourn p95 (ms)",
+                      "Sojourn p99 (ms)"]
+
+    BUFFER_SIZE = 1024 * 1024   # bytes
+
+    def __init__(self, log_file, run_time, flush_rows=1000, flush_sec=1.0, latency=False):
+        self.log_file = log_file
+        self.run_time = run_time
+        self.latency = latency
+        self.flush_rows = flush_rows
+        self.flush_sec = flush_sec
+        self.rows_since_flush = 0
+        self.last_flush = time.monotonic()
+
+        log_dir = os.path.dirname(log_file)
+        if log_dir and not os.path.isdir(log_dir):
+            os.makedirs(log_dir)
+
+        self.file = open(log_file, 'a', buffering=self.BUFFER_SIZE)
+        self.writer = csv.writer(self.file)
+        if self.file.tell() == 0:
+            self.writer.writerow(self.HEADER + self.LATENCY_HEADER if latency else self.HEADER)
+
+    def write_epoch(self, rlist, epoch_num, sojourn=None):
+        # sojourn: with latency columns, the (p50, p95, p99) sojourn times in ms of each radio (or None)
+        rows = [[r.name,
+                 self.run_time,
+                 r.epochs_per_sec,
+                 epoch_num,
+                 r.online,
+                 r.q_len,
+                 r.burst_din_bps,
+                 r.burst_din_bps,
+                 r.current_epoch_value,
+                 r.value_per_kb_tx] for r in rlist]
+        if self.latency:
+            for row, pcts in zip(rows, sojourn):
+                row.extend(pcts if pcts is not None else ('', '', ''))
+        self.writer.writerows(rows)
+        self.rows_since_flush += len(rows)
+
+        if (self.rows_since_flush >= self.flush_rows) or ((time.monotonic() - self.last_flush) >= self.flush_sec):
+            self.flush()
+
+    def flush(self):
+        if self.file.closed:
+            return
+        self.file.flush()
+        self.rows_since_flush = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class RadioHistoryWriter:
+    """Appends Radio Report data as fixed-width little-endian binary records.
+
+    File layout:
+        header  (32 bytes):  magic b'RQHIST01', format version (u32), record size (u32),
+                             epochs per second (f64), run start time in seconds since the epoch (f64)
+        records (40 bytes):  epoch count (u32), radio index (u32), queue length in bytes (i64),
+                             data input rate in b/s (f64), data output rate in b/s (f64), epoch value (f64)
+                             and, with latency=True (64 bytes), p50, p95 and p99 sojourn time in ms (f64, NaN when
+                             nothing was sent)
+
+    Radio indexes are positions in the Radio list.  The radio names are appended, one per line, to a companion
+    '<log file>.radios' text file as radios are first seen.  Buffering and flushing work as in RadioReportWriter.
+    """
+
+    MAGIC = b'RQHIST01'
+    VERSION = 1
+    HEADER = struct.Struct('<8sIIdd')
+    RECORD = struct.Struct('<IIqddd')
+    LATENCY_RECORD = struct.Struct('<IIqdddddd')
+
+    BUFFER_SIZE = 1024 * 1024   # bytes
+
+    def __init__(self, log_file, epochs_per_sec, flush_rows=1000, flush_sec=1.0, latency=False):
+        self.log_file = log_file
+        self.latency = latency
+        self.record = self.LATENCY_RECORD if latency else self.RECORD
+        self.flush_rows = flush_rows
+        self.flush_sec = flush_sec
+        self.rows_since_flush = 0
+        self.last_flush = time.monotonic()
+
+        log_dir = os.path.dirname(log_file)
+        if log_dir and not os.path.isdir(log_dir):
+            os.makedirs(log_dir)
+
+        self.file = open(log_file, 'ab', buffering=self.BUFFER_SIZE)
+        if self.file.tell() == 0:
+            self.file.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.record.size, epochs_per_sec, time.time()))
+        self.names_file = open(log_file + '.radios', 'a')
+        self.num_names = 0
+
+    def write_epoch(self, rlist, epoch_num, sojourn=None):
+        if len(rlist) > self.num_names:
+            for r in rlist[self.num_names:]:
+                self.names_file.write(r.name + '\n')
+            self.names_file.flush()
+            self.num_names = len(rlist)
+
+        pack = self.record.pack
+        if self.latency:
+            nan = float('nan')
+            self.file.write(b''.join([pack(epoch_num, idx, r.q_len, r.burst_din_bps, r.dout_bps, r.current_epoch_value,
+                                           *(pcts if pcts is not None else (nan, nan, nan)))
+                                      for idx, (r, pcts) in enumerate(zip(rlist, sojourn))]))
+        else:
+            self.file.write(b''.join([pack(epoch_num, idx, r.q_len, r.burst_din_bps, r.dout_bps, r.current_epoch_value)
+                                      for idx, r in enumerate(rlist)]))
+        self.rows_since_flush += len(rlist)
+
+        if (self.rows_since_flush >= self.flush_rows) or ((time.monotonic() - self.last_flush) >= self.flush_sec):
+            self.flush()
+
+    def flush(self):
+        if self.file.closed:
+            return
+        self.file.flush()
+        self.rows_since_flush = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+        self.names_file.close()
+
+
+# ------------------------------------------------------------------------------
+
+
+def load_radio_history(log_file):
+    """Maps a RadioHistoryWriter log into memory with no parsing.
+
+    Returns (records, radio_names, header): records is a read-only NumPy memmap structured array with the fields
+    'epoch', 'radio', 'q_len', 'din_bps', 'dout_bps' and 'epoch_value' (and 'sojourn_p50', 'sojourn_p95' and
+    'sojourn_p99' in a log written with latency=True); radio_names maps the 'radio' index to a
+    radio name; header is a dict of the file header fields.  A partially written last record (from a log that is
+    still being written) is left out.
+    """
+    import numpy as np
+
+    with open(log_file, 'rb') as f:
+        magic, version, record_size, epochs_per_sec, start_time = RadioHistoryWriter.HEADER.unpack(
+            f.read(RadioHistoryWriter.HEADER.size))
+    if magic != RadioHistoryWriter.MAGIC:
+        raise ValueError("'{}' is not a Radio History log file.".format(log_file))
+
+    fields = [('epoch', '<u4'), ('radio', '<u4'), ('q_len', '<i8'),
+              ('din_bps', '<f8'), ('dout_bps', '<f8'), ('epoch_value', '<f8')]
+    if record_size == RadioHistoryWriter.LATENCY_RECORD.size:
+        fields += [('sojourn_p50', '<f8'), ('sojourn_p95', '<f8'), ('sojourn_p99', '<f8')]
+    dtype = np.dtype(fields)
+    if record_size != dtype.itemsize:
+        raise ValueError("'{}' has {} byte records; expected {}.".format(log_file, record_size, dtype.itemsize))
+
+    num_records = (os.path.getsize(log_file) - RadioHistoryWriter.HEADER.size) // record_size
+    if num_records > 0:
+        records = np.memmap(log_file, dtype=dtype, mode='r', offset=RadioHistoryWriter.HEADER.size,
+                            shape=(num_records,))
+    else:
+        records = np.zeros(0, dtype=dtype)
+
+    radio_names = []
+    if os.path.isfile(log_file + '.radios'):
+        with open(log_file + '.radios', 'r') as f:
+            radio_names = f.read().splitlines()
+
+    header = {'version': version, 'record_size': record_size, 'epochs_per_sec': epochs_per_sec,
+              'start_time': start_time}
+    return records, radio_names, header
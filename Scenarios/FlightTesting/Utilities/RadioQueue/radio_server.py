@@ -0,0 +1,202 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---           Socket Server for the Radio Queue Status Display             ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Serves RadioQueue's inputs and outputs over a local Unix or TCP        ---
+# --- socket as newline-delimited JSON, instead of the data_input_rates.json,---
+# --- bw_allocs.json and radio_queues.json files.  The asyncio event loop    ---
+# --- runs in its own thread, next to the epoch loop.                        ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+#
+# Messages (one JSON object per line):
+#   client -> server
+#       {"type": "rates", "radios": [...]}      replace the data input rates (the data_input_rates.json contents)
+#       {"type": "allocs", "radios": [...]}     replace the bandwidth allocations (the bw_allocs.json contents)
+#       {"type": "subscribe"}                   receive a "queues" message after every epoch
+#       {"type": "unsubscribe"}                 stop receiving "queues" messages
+#       {"type": "get"}                         receive the latest "queues" message once
+#   server -> client
+#       {"type": "queues", "epoch": N, "time": T, "radios": [...]}  (the radio_queues.json contents)
+#       {"type": "error", "error": "..."}
+
+import os
+import json
+import stat
+import time
+import asyncio
+import threading
+
+
+# Numeric fields of the pushed radio dictionaries, by message type (each optional, as in the JSON files)
+RADIO_FIELDS = {
+    'rates': ("DataInRate-bps", "Burstiness", "ValuePerKbTx"),
+    'allocs': ("AllocatedBw-bps",),
+}
+LIST_FIELDS = ("ValuePerKbTx",)     # may also list one number per class queue (see class_queues.py)
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+def check_radios(radios, fields):
+    # Raises ValueError unless radios is a list of radio dictionaries with a string "RadioName" and numeric fields
+    if not isinstance(radios, list):
+        raise ValueError("'radios' must be a list of radio objects")
+    for d in radios:
+        if not isinstance(d, dict):
+            raise ValueError("'radios' entries must be objects, not {}".format(json.dumps(d)))
+        if not isinstance(d.get('RadioName'), str):
+            raise ValueError("radio entry has no string 'RadioName': {}".format(json.dumps(d)))
+        for field in fields:
+            value = d.get(field, 0)
+            if (field in LIST_FIELDS) and isinstance(value, list) and value:
+                numeric = all(is_number(v) for v in value)     # one value per class queue
+            else:
+                numeric = is_number(value)
+            if not numeric:
+                raise ValueError("radio '{}': '{}' must be a number{}".format(
+                    d['RadioName'], field, " or a non-empty list of numbers" if field in LIST_FIELDS else ""))
+    return radios
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class RadioQueueServer:
+    """NDJSON socket server for RadioQueue inputs (pushed rates and allocations) and outputs (per-epoch queues).
+
+    address is 'unix:<path>', or 'tcp:<host>:<port>' (or just '<host>:<port>').  The epoch loop reads the latest
+    pushed inputs with inputs(), and hands each epoch's queue list to publish(), which returns at once: encoding
+    and sending happen on the server thread.  A subscriber that has more than MAX_BUFFERED_BYTES of unsent data
+    (i.e. is not keeping up) misses epochs until it catches up, rather than making the server buffer without limit.
+    """
+
+    MAX_BUFFERED_BYTES = 1024 * 1024
+    MAX_LINE_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, address, rates=None, allocs=None):
+        self.address = address
+        self.rates = rates if rates is not None else []
+        self.allocs = allocs if allocs is not None else []
+        self.subscribers = set()
+        self.latest = None          # latest "queues" message: (epoch, time, queues), and its encoding once needed
+        self.latest_line = None
+        self.dropped = 0            # "queues" messages not sent to slow subscribers
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.error = None
+        self.started = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='RadioQueue-server', daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.error is not None:
+            raise self.error
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(self.listen())
+        except Exception as e:
+            self.error = e
+            self.started.set()
+            return
+        self.started.set()
+        self.loop.run_forever()
+
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    async def listen(self):
+        if self.address.startswith('unix:'):
+            path = self.address[len('unix:'):]
+            if os.path.lexists(path):
+                if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                    raise FileExistsError("{} exists and is not a socket; not replacing it".format(path))
+                os.unlink(path)     # left over from an earlier run
+            return await asyncio.start_unix_server(self.handle_client, path=path, limit=self.MAX_LINE_BYTES)
+        host, port = self.address[len('tcp:'):].rsplit(':', 1) if self.address.startswith('tcp:') \
+            else self.address.rsplit(':', 1)
+        return await asyncio.start_server(self.handle_client, host=host, port=int(port), limit=self.MAX_LINE_BYTES)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    msg = json.loads(line)
+                    msg_type = msg['type']
+                    if msg_type == 'rates':
+                        self.rates = check_radios(msg['radios'], RADIO_FIELDS['rates'])
+                    elif msg_type == 'allocs':
+                        self.allocs = check_radios(msg['radios'], RADIO_FIELDS['allocs'])
+                    elif msg_type == 'subscribe':
+                        self.subscribers.add(writer)
+                    elif msg_type == 'unsubscribe':
+                        self.subscribers.discard(writer)
+                    elif msg_type == 'get':
+                        if self.latest is not None:
+                            writer.write(self.encode_latest())
+                    else:
+                        raise ValueError("unknown message type '{}'".format(msg_type))
+                except (ValueError, KeyError, TypeError) as e:
+                    writer.write((json.dumps({'type': 'error', 'error': str(e)}) + '\n').encode())
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    def inputs(self):
+        # returns (list of Radio data input rate dictionaries, list of Radio bandwidth allocation dictionaries)
+        return self.rates, self.allocs
+
+    def publish(self, epoch_num, queues):
+        # Called from the epoch loop: hand the epoch's queues to the server thread
+        self.loop.call_soon_threadsafe(self.broadcast, epoch_num, time.time(), queues)
+
+    def broadcast(self, epoch_num, epoch_time, queues):
+        self.latest = (epoch_num, epoch_time, queues)
+        self.latest_line = None     # only encoded if someone wants it
+        for writer in list(self.subscribers):
+            if writer.is_closing():
+                self.subscribers.discard(writer)
+            elif writer.transport.get_write_buffer_size() > self.MAX_BUFFERED_BYTES:
+                self.dropped += 1
+            else:
+                writer.write(self.encode_latest())
+
+    def encode_latest(self):
+        if self.latest_line is None:
+            epoch_num, epoch_time, queues = self.latest
+            self.latest_line = (json.dumps({'type': 'queues', 'epoch': epoch_num, 'time': epoch_time,
+                                            'radios': queues}, separators=(',', ':')) + '\n').encode()
+        return self.latest_line
+
+    def close(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(5.0)
+        if self.address.startswith('unix:') and (self.server is not None):
+            path = self.address[len('unix:'):]
+            if os.path.lexists(path) and stat.S_ISSOCK(os.lstat(path).st_mode):
+                os.unlink(path)
@@ -0,0 +1,144 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---       Sliding-Window Statistics for the Radio Queue Status Display     ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Keeps the mean, min, max, EWMA and (optionally) percentiles of the     ---
+# --- last N values of a series, with an O(1) cost per new value however     ---
+# --- large N is.                                                            ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+import math
+from array import array
+from collections import deque
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class RunningStats:
+    """Statistics over a sliding window of the last `window` values pushed.
+
+    - mean:  running sum of a ring buffer, with Neumaier compensation (so rounding errors do not build up over a
+             long run)
+    - min, max:  monotonic deques of (push count, value)
+    - ewma:  exponentially weighted moving average, with smoothing factor alpha [default: 2 / (window + 1)]
+    - percentile():  from a fixed-bin histogram over [hist_min, hist_max) of the values in the window, accurate to
+             one bin width.  Only kept when hist_bins > 0.  Values outside the range are counted in the end bins.
+
+    NaN and infinite values are not added to the window (they would poison the sum and cannot be binned); they
+    are counted in nonfinite.
+
+    Every push() is O(1) (amortized, for the min and max deques).  percentile() is O(hist_bins).
+    """
+
+    def __init__(self, window, alpha=None, hist_bins=0, hist_min=0.0, hist_max=100.0):
+        if window < 1:
+            raise ValueError("RunningStats window must be at least 1 value, not {}".format(window))
+        self.window = window
+        self.alpha = alpha if alpha is not None else 2.0 / (window + 1)
+        self.hist_bins = hist_bins
+        self.hist_min = hist_min
+        self.hist_max = hist_max
+        self.bin_width = (hist_max - hist_min) / hist_bins if hist_bins > 0 else 0.0
+        self.clear()
+
+    def clear(self):
+        self.ring = array('d', bytes(8 * self.window))
+        self.pushes = 0                   # number of values pushed since clear()
+        self.nonfinite = 0                # number of NaN or infinite values dropped since clear()
+        self.sum = 0.0
+        self.sum_error = 0.0              # low-order bits lost from sum, added back in mean
+        self.ewma = 0.0
+        self.min_q = deque()              # (push count, value), values increasing
+        self.max_q = deque()              # (push count, value), values decreasing
+        if self.hist_bins > 0:
+            self.hist = array('q', bytes(8 * self.hist_bins))
+
+    def __len__(self):
+        return min(self.pushes, self.window)
+
+    def push(self, value):
+        value = float(value)
+        if not math.isfinite(value):
+            self.nonfinite += 1
+            return
+        pos = self.pushes % self.window
+        if self.pushes >= self.window:
+            old = self.ring[pos]
+            self.add(-old)
+            if self.hist_bins > 0:
+                self.hist[self.bin(old)] -= 1
+        self.ring[pos] = value
+        self.add(value)
+        if self.hist_bins > 0:
+            self.hist[self.bin(value)] += 1
+
+        if self.pushes == 0:
+            self.ewma = value
+        else:
+            self.ewma += self.alpha * (value - self.ewma)
+
+        expired = self.pushes - self.window
+        while self.min_q and self.min_q[-1][1] >= value:
+            self.min_q.pop()
+        self.min_q.append((self.pushes, value))
+        if self.min_q[0][0] <= expired:
+            self.min_q.popleft()
+        while self.max_q and self.max_q[-1][1] <= value:
+            self.max_q.pop()
+        self.max_q.append((self.pushes, value))
+        if self.max_q[0][0] <= expired:
+            self.max_q.popleft()
+
+        self.pushes += 1
+
+    def add(self, value):
+        # Neumaier (compensated) summation: sum + sum_error is the exact running sum to within one rounding
+        total = self.sum + value
+        if abs(self.sum) >= abs(value):
+            self.sum_error += (self.sum - total) + value
+        else:
+            self.sum_error += (value - total) + self.sum
+        self.sum = total
+
+    def bin(self, value):
+        idx = int((value - self.hist_min) / self.bin_width)
+        return min(max(idx, 0), self.hist_bins - 1)
+
+    @property
+    def last(self):
+        return self.ring[(self.pushes - 1) % self.window] if self.pushes else 0.0
+
+    @property
+    def mean(self):
+        return (self.sum + self.sum_error) / max(len(self), 1)
+
+    @property
+    def min(self):
+        return self.min_q[0][1] if self.min_q else 0.0
+
+    @property
+    def max(self):
+        return self.max_q[0][1] if self.max_q else 0.0
+
+    def percentile(self, pct):
+        """Approximate pct-th percentile (0-100) of the values in the window: the midpoint of the bin it falls in."""
+        if self.hist_bins == 0:
+            raise ValueError("RunningStats percentiles need hist_bins > 0")
+        count = len(self)
+        if count == 0:
+            return 0.0
+        rank = pct / 100.0 * (count - 1)
+        seen = 0
+        for idx, n in enumerate(self.hist):
+            seen += n
+            if seen > rank:
+                value = self.hist_min + (idx + 0.5) * self.bin_width
+                return min(max(value, self.min), self.max)
+        return self.max
@@ -0,0 +1,127 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---      Scenario Timelines for the Radio Queue Status Display             ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Loads a scenario CSV file (the format used by gen_datarate_scenario.py)---
+# --- or a bandwidth allocation CSV file into an in-memory timeline of the   ---
+# --- radio dictionaries in effect at each point of simulated time.  A      ---
+# --- timeline can also be saved as, and loaded from, one compact JSON file. ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+import csv
+import json
+import bisect
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class Timeline:
+    """Sorted list of (time in seconds, list of radio dictionaries) entries.
+
+    The entry in effect at time t is the last one whose time is <= t, just as if datarate_updater.py had copied
+    that entry's JSON file into place at its scheduled time.  Before the first entry, the radio list is empty.
+    """
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda e: e[0])
+        self.times = [e[0] for e in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def at(self, t):
+        idx = bisect.bisect_right(self.times, t) - 1
+        if idx < 0:
+            return []
+        return self.entries[idx][1]
+
+    def end_time(self):
+        """Time at which the last entry expires, using the previous entry's duration (as datarate_updater.py does)."""
+        if len(self.times) == 0:
+            return 0
+        if len(self.times) == 1:
+            return self.times[0]
+        return self.times[-1] + (self.times[-1] - self.times[-2])
+
+
+# ------------------------------------------------------------------------------
+
+
+def read_timeline_rows(csv_file):
+    # Yields the stripped fields of each non-blank row.  'utf-8-sig' drops the byte order mark some editors add.
+    with open(csv_file, newline='', encoding='utf-8-sig') as f:
+        for row in csv.reader(f, delimiter=','):
+            row = [field.strip() for field in row]
+            if len(row) == 0 or row[0] == '':
+                continue
+            yield row
+
+
+# ------------------------------------------------------------------------------
+
+
+def group_rows_by_time(rows, make_radio_dict):
+    entries = {}
+    for row in rows:
+        entries.setdefault(float(row[0]), []).append(make_radio_dict(row))
+    return Timeline(entries.items())
+
+
+# ------------------------------------------------------------------------------
+
+
+def load_rate_timeline(csv_file):
+    """Scenario CSV rows: <TIME>, <RADIO_NAME>, <INPUT_DATA_RATE_BPS>, <BURSTINESS>, <VALUE_PER_KB_TX>
+
+    (or a timeline file written by save_timeline(), if the file name ends with '.json')
+    """
+    if csv_file.endswith('.json'):
+        return load_timeline(csv_file)
+    return group_rows_by_time(read_timeline_rows(csv_file),
+                              lambda row: {"RadioName": row[1],
+                                           "DataInRate-bps": int(row[2]),
+                                           "Burstiness": float(row[3]),
+                                           "ValuePerKbTx": float(row[4])})
+
+
+# ------------------------------------------------------------------------------
+
+
+def load_alloc_timeline(csv_file):
+    """Bandwidth allocation CSV rows: <TIME>, <RADIO_NAME>, <ALLOCATED_BW_BPS>
+
+    (or a timeline file written by save_timeline(), if the file name ends with '.json')
+    """
+    if csv_file.endswith('.json'):
+        return load_timeline(csv_file)
+    return group_rows_by_time(read_timeline_rows(csv_file),
+                              lambda row: {"RadioName": row[1],
+                                           "AllocatedBw-bps": int(row[2])})
+
+
+# ------------------------------------------------------------------------------
+
+
+def save_timeline(timeline, json_file):
+    """Writes the timeline as one compact JSON file: {"Times": [t0, t1, ...], "Radios": [[...], [...], ...]}, where
+    Radios[i] is the list of radio dictionaries that takes effect at Times[i] (sorted by time)."""
+    with open(json_file, 'w') as f:
+        json.dump({"Times": timeline.times, "Radios": [e[1] for e in timeline.entries]}, f, separators=(',', ':'))
+
+
+# ------------------------------------------------------------------------------
+
+
+def load_timeline(json_file):
+    with open(json_file, 'r', encoding='utf-8-sig') as f:
+        d = json.load(f)
+    if len(d["Times"]) != len(d["Radios"]):
+        raise ValueError("'{}' has {} times but {} radio lists".format(json_file, len(d["Times"]), len(d["Radios"])))
+    return Timeline(zip(d["Times"], d["Radios"]))
@@ -0,0 +1,206 @@
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# ---           Traffic Models for the Radio Queue Status Display            ---
+# ---                                                                        ---
+# --- Last Updated: October 18, 2026                                         ---
+# ------------------------------------------------------------------------------
+# ---                                                                        ---
+# --- Models of a radio's actual data input rate, epoch by epoch, selected   ---
+# --- per radio with the "TrafficModel" key of data_input_rates.json.  Each  ---
+# --- model generates a block of epochs at a time with NumPy, so the cost    ---
+# --- per epoch is one array lookup.                                         ---
+# ---                                                                        ---
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+#
+# data_input_rates.json keys (in addition to "RadioName", "DataInRate-bps", ...):
+#   "TrafficModel": "uniform"   DataInRate-bps * (1 + uniform(-Burstiness, Burstiness)), drawn fresh every epoch
+#                               (the same model as a radio with no "TrafficModel" key)
+#   "TrafficModel": "onoff"     Markov on/off source: sends at DataInRate-bps * (MeanOn + MeanOff) / MeanOn while
+#                               on, and nothing while off, so its average rate is DataInRate-bps.  The on and off
+#                               periods are geometrically distributed with means "MeanOn-sec" and "MeanOff-sec".
+#   "TrafficModel": "poisson"   Poisson packet arrivals of "PacketSize-bytes" byte packets, averaging DataInRate-bps
+#   "TrafficModel": "trace"     Replays the rates (b/s) recorded in "TraceFile", one per "TraceInterval-ms" [default:
+#                               the epoch size], looping at the end.  DataInRate-bps is ignored.  The file is a .npy
+#                               array, or a text/CSV file whose last column is the rate.
+
+import numpy as np
+
+
+BLOCK_EPOCHS = 4096                 # epochs generated at a time
+
+MODEL_KEYS = ("TrafficModel", "Burstiness", "MeanOn-sec", "MeanOff-sec", "PacketSize-bytes", "TraceFile",
+              "TraceInterval-ms")
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+class TrafficModel:
+    """Base class: next(din_bps) returns the actual data input rate (b/s) for the next epoch.
+
+    Subclasses implement generate(din_bps, n), returning the next n epochs as an array, either of multipliers of
+    din_bps (multiplier = True) or of rates.  If the rates depend on din_bps (depends_on_din = True), the rest of
+    the block is thrown away and a new one generated when din_bps changes.
+    """
+
+    multiplier = True
+    depends_on_din = False
+
+    def __init__(self, epochs_per_sec, rng):
+        self.epochs_per_sec = epochs_per_sec
+        self.rng = rng
+        self.spec = None            # the data_input_rates.json settings this model was made from
+        self.block = None
+        self.block_din = None
+        self.pos = 0
+
+    def next(self, din_bps):
+        if (self.block is None) or (self.pos >= len(self.block)) or \
+                (self.depends_on_din and (din_bps != self.block_din)):
+            self.block = self.generate(din_bps, BLOCK_EPOCHS)
+            self.block_din = din_bps
+            self.pos = 0
+        value = float(self.block[self.pos])
+        self.pos += 1
+        return din_bps * value if self.multiplier else value
+
+    def generate(self, din_bps, n):
+        raise NotImplementedError
+
+
+# ------------------------------------------------------------------------------
+
+
+class UniformModel(TrafficModel):
+
+    def __init__(self, epochs_per_sec, rng, burstiness=0.0):
+        TrafficModel.__init__(self, epochs_per_sec, rng)
+        self.burstiness = burstiness
+
+    def generate(self, din_bps, n):
+        return 1 + self.rng.uniform(-self.burstiness, self.burstiness, n)
+
+
+# ------------------------------------------------------------------------------
+
+
+class OnOffModel(TrafficModel):
+
+    def __init__(self, epochs_per_sec, rng, mean_on_sec=1.0, mean_off_sec=1.0):
+        TrafficModel.__init__(self, epochs_per_sec, rng)
+        if mean_on_sec <= 0 or mean_off_sec < 0:
+            raise ValueError("onoff traffic model: MeanOn-sec must be > 0 and MeanOff-sec >= 0")
+        # Mean period lengths in epochs (at least 1), and the multiplier that keeps the average rate at din_bps
+        self.mean_epochs = {True: max(mean_on_sec * epochs_per_sec, 1.0),
+                            False: max(mean_off_sec * epochs_per_sec, 1.0) if mean_off_sec > 0 else 0.0}
+        self.level = {True: (mean_on_sec + mean_off_sec) / mean_on_sec, False: 0.0}
+        self.on = bool(rng.random() < (mean_on_sec / (mean_on_sec + mean_off_sec)))
+        self.remaining = self.draw_period(self.on)
+
+    def draw_period(self, on):
+        if self.mean_epochs[on] == 0:
+            return 0
+        return int(self.rng.geometric(1.0 / self.mean_epochs[on]))
+
+    def generate(self, din_bps, n):
+        out = np.empty(n)
+        filled = 0
+        while filled < n:
+            take = min(self.remaining, n - filled)
+            out[filled:filled + take] = self.level[self.on]
+            filled += take
+            self.remaining -= take
+            if self.remaining == 0:
+                self.on = not self.on
+                self.remaining = self.draw_period(self.on)
+                if self.remaining == 0:                 # MeanOff-sec of 0: always on
+                    self.on = True
+                    self.remaining = n
+        return out
+
+
+# ------------------------------------------------------------------------------
+
+
+class PoissonModel(TrafficModel):
+
+    multiplier = False
+    depends_on_din = True
+
+    def __init__(self, epochs_per_sec, rng, packet_size_bytes=1500):
+        TrafficModel.__init__(self, epochs_per_sec, rng)
+        if packet_size_bytes <= 0:
+            raise ValueError("poisson traffic model: PacketSize-bytes must be > 0")
+        self.packet_bits = packet_size_bytes * 8
+
+    def generate(self, din_bps, n):
+        # A negative or non-finite rate (e.g. from a bad live input) sends nothing, rather than failing the epoch
+        packets_per_epoch = din_bps / self.packet_bits / self.epochs_per_sec
+        packets_per_epoch = max(0.0, packets_per_epoch) if np.isfinite(packets_per_epoch) else 0.0
+        return self.rng.poisson(packets_per_epoch, n) * (self.packet_bits * self.epochs_per_sec)
+
+
+# ------------------------------------------------------------------------------
+
+
+class TraceModel(TrafficModel):
+
+    multiplier = False
+
+    def __init__(self, epochs_per_sec, rng, trace_file=None, trace_interval_ms=None):
+        TrafficModel.__init__(self, epochs_per_sec, rng)
+        if trace_file is None:
+            raise ValueError("trace traffic model: TraceFile is required")
+        self.trace = load_trace(trace_file)
+        if len(self.trace) == 0:
+            raise ValueError("trace traffic model: '{}' has no rates".format(trace_file))
+        epoch_ms = 1000 / epochs_per_sec
+        self.step = epoch_ms / (trace_interval_ms if trace_interval_ms else epoch_ms)   # trace samples per epoch
+        self.epoch = 0
+
+    def generate(self, din_bps, n):
+        samples = (np.floor((self.epoch + np.arange(n)) * self.step).astype(np.int64)) % len(self.trace)
+        self.epoch += n
+        return self.trace[samples]
+
+
+def load_trace(trace_file):
+    if trace_file.endswith('.npy'):
+        trace = np.load(trace_file)
+    else:
+        trace = np.loadtxt(trace_file, delimiter=',', ndmin=2, encoding='utf-8-sig')
+    if trace.ndim > 1:
+        trace = trace[:, -1]
+    return trace.astype(float)
+
+
+# ------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+
+def model_spec(d):
+    # The settings of a radio's data input rate dictionary that its traffic model is made from
+    return tuple(d.get(key) for key in MODEL_KEYS)
+
+
+# ------------------------------------------------------------------------------
+
+
+def make_traffic_model(d, epochs_per_sec, rng):
+    """Returns the TrafficModel described by a data input rate dictionary (which has a "TrafficModel" key)."""
+    name = str(d["TrafficModel"]).lower()
+    if name == 'uniform':
+        model = UniformModel(epochs_per_sec, rng, float(d.get("Burstiness", 0.0)))
+    elif name == 'onoff':
+        model = OnOffModel(epochs_per_sec, rng, float(d.get("MeanOn-sec", 1.0)), float(d.get("MeanOff-sec", 1.0)))
+    elif name == 'poisson':
+        model = PoissonModel(epochs_per_sec, rng, float(d.get("PacketSize-bytes", 1500)))
+    elif name == 'trace':
+        model = TraceModel(epochs_per_sec, rng, d.get("TraceFile"), d.get("TraceInterval-ms"))
+    else:
+        raise ValueError("Unknown TrafficModel '{}' for radio '{}': use uniform, onoff, poisson or trace".format(
+            d["TrafficModel"], d.get("RadioName")))
+    model.spec = model_spec(d)
+    return model
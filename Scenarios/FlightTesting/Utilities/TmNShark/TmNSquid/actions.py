@@ -1,14 +1,16 @@
 import os
-import csv
 from datetime import datetime
 import time
+from collections import defaultdict
 
 from scapy.all import *
 from lxml import etree
-from bitarray import bitarray
 
 from TmNShark.TmNSquid.tmns_datafield import TmnsDataField
-from TmNShark.TmNSquid.tmns_pcap_reader import TmnsPcapReader
+from TmNShark.TmNSquid.tmns_package_plan import TmnsPackagePlan, DEFAULT_TIME_OFFSET_INCREMENT
+from TmNShark.TmNSquid.tmns_pcap_reader import TmnsPcapReader, iter_messages
+from TmNShark.TmNSquid.tmns_measurement_sink import REALTIME_FLUSH_SEC
+from TmNShark.TmNSquid.tmns_measurement_store import make_measurement_sink
 
 
 ns = {"xsd": "http://www.w3.org/2001/XMLSchema",
@@ -19,96 +21,101 @@ ns = {"xsd": "http://www.w3.org/2001/XMLSchema",
 # shortcut dictionary for passing common arguments
 n = {"namespaces": ns}
 
+BULK_BATCH_PACKAGES = 4096  # packages of a PDID decoded at once by bulk_decode_tdm_file
+
 
 def show(xml):
     return print(etree.tounicode(xml, pretty_print=True))
 
 
-def get_field_info(data_structure, package):
-    field_info = []
+def compile_package_plan(pdid, package, data_structure, measurement_names, missing_measurements):
+    """Compiles the layout of a package's measurement fields (see TmnsDataField) from its PackageDefinition and
+    DataStructure.  measurement_names maps Measurement IDs to names; the IDs it does not have are added to the
+    missing_measurements set, and their fields are not decoded."""
 
-    for field in data_structure.xpath(".//mdl:DataStructureField", **n):
+    fields = []
 
+    for field in data_structure.xpath(".//mdl:DataStructureField", **n):
         field_id = field.get("ID")
 
-        measurement_name = None
+        # Offsets and widths are in bits from the start of the package payload
+        offset = int(field.findtext("mdl:FieldLocation/mdl:FieldOffset/mdl:OffsetValue/mdl:Value", default="0", **n))
+        width = int(field.findtext("mdl:FieldLocation/mdl:FieldWidth/mdl:Value", **n))
+        repetitions = int(field.findtext("mdl:FieldRepetitions", default="1", **n))
+        # Without a FieldOffsetIncrement the repetitions of a field touch
+        increment = int(field.findtext("mdl:FieldOffsetIncrement/mdl:Value", default="0", **n)) or width
 
-        mapped_data_words = package.xpath(".//mdl:DataWordToFieldMap[.//mdl:DataStructureFieldRef[@IDREF = '{}']]".format(field_id), **n)
+        mapped_data_words = package.xpath(".//mdl:DataWordToFieldMap[mdl:DataStructureFieldRef/@IDREF = $field_id]",
+                                          field_id=field_id, **n)
         for word in mapped_data_words:
             measurement_id = word.xpath("mdl:DataWord/mdl:MeasurementRef/@IDREF", **n)[0]
+            measurement_name = measurement_names.get(measurement_id)
+            if measurement_name is None:
+                missing_measurements.add(measurement_id)
+                continue
 
-            try:
-                measurement = data_structure.xpath("//mdl:Measurement[@ID = '{}']".format(measurement_id), **n)[0]
-            except IndexError:
-                print("Your file is bad.")
-                os.exit(-1)
-            measurement_name = measurement.find("mdl:Name", **n)
+            time_offset = int(word.findtext("mdl:TimeOffset", default="0", **n))
+            time_increment = int(word.findtext("mdl:TimeOffsetIncrement", default=str(DEFAULT_TIME_OFFSET_INCREMENT),
+                                               **n))
+            fields.append(TmnsDataField(width, measurement_name, offset, repetitions, increment,
+                                        time_offset, time_increment))
 
-        # todo: offset (this is tricky because you have to count from the beginning of the message)
-        # also offset increment (we're just going to assume they all touch for now)
+    return TmnsPackagePlan(pdid, package.findtext("mdl:Name", **n), fields)
 
-        width = int(((field.xpath(".//mdl:FieldLocation/mdl:FieldWidth/mdl:Value", **n))[0]).text)
-        repetitions = int((field.xpath(".//mdl:FieldRepetitions", **n)[0]).text)
 
-        info = TmnsDataField(width, measurement_name)
+def iter_packages(messages):
+    """ This generator yields (message, package, package time) for each package of each message
+        in messages, with the package time in integer ns."""
+
+    for message in messages:
+        message_time = (message.time_sec * 1000000000) + message.time_nanosec
+        for package in message.packages:
+            yield message, package, message_time + package.time_delta
 
-        if repetitions == 0:
-            # special case because it's infinite
-            field_info = itertools.chain(field_info, itertools.repeat(info))
-        else:
-            for i in range(repetitions):
-                field_info.append(info)
 
-    return field_info
+def iter_measurements(packages, package_decoders):
+    """ This generator decodes each (message, package, package time) of packages (see iter_packages)
+        whose PDID has a decoder, and yields (measurement name, [(value, timestamp), ...]) for each
+        measurement of the package.  Packages of other PDIDs are skipped."""
 
+    for _message, package, package_time in packages:
+        decoder = package_decoders.get(package.pdid)
+        if decoder is None:
+            continue
+        yield from decoder(package.payload, package_time).items()
 
-def make_tdm_packet_list(bfile, package_decoders):
-    """ This function reads a binary file (bfile) of TmNS Data Messages, parses the
-        TDMs, and adds each TDM to the list of TDMs (tdm_list).
-        It returns the TDM list."""
+
+def make_tdm_packet_list(bfile, package_decoders, output_format='csv'):
+    """ This function reads a binary file (bfile) of TmNS Data Messages one at a time, decodes the
+        measurements of each TDM and writes them to a CSV file per measurement (see
+        TmnsMeasurementSink), or a measurement store in another output_format, in a new folder
+        under 'measurements'.
+        It returns the TDM list, which is always empty: TDMs are not kept in memory."""
 
     tdm_list = []
 
     if os.path.exists(bfile):
-        with open(bfile, mode='rb') as f:
-            reader = TmnsPcapReader(f)
-
-            count = 0
-            while True:
-                message = reader.get_message()
-                if message is None:
-                    print("Message is none now.")
-                    break
-
-                count = count + 1
-                for package in message.packages:
-                    package_time = message.time_nanosec + package.time_delta + (message.time_sec * 1e9)
-                    payload = bitarray()
-                    payload.frombytes(package.payload)
-                    measurements = package_decoders[package.pdid](payload, package_time)
-                    cnt_key = 0
-                    for _measurement_name, value in measurements.items():
-                        with open(r'measurements/' + str(count) + '-' + str(_measurement_name) + "-" + str(message.sequence_number) + r'.csv',
-                                  'w') as csvfile:
-                            cnt_key = cnt_key + 1
-                            csv_out = csv.writer(csvfile)
-                            csv_out.writerow(['value', 'timestamp'])
-                            for row in value:
-                                csv_out.writerow(row)
+        mydir = os.path.join('measurements/', datetime.now().strftime('%Y-%m-%d_%H-%M-%S'))
+        os.makedirs(mydir)
+        with make_measurement_sink(mydir, output_format) as sink:
+            packages = iter_packages(iter_messages(bfile))
+            for _measurement_name, value in iter_measurements(packages, package_decoders):
+                sink.write(_measurement_name, value)
+        print("Message is none now.")
         return tdm_list
     else:
-        print("The file '{0}' was not found.".format(bin))
+        print("The file '{0}' was not found.".format(bfile))
         return tdm_list
 
 
-def realtime_tdm_stream_to_network_output(stream_of_data: str, package_decoders: {}):
-    """ This function reads a binary stream of TmNS Data Messages from a pipe """
+def realtime_tdm_stream_to_network_output(stream_of_data: str, package_decoders: {}, output_format: str = 'csv'):
+    """ This function reads a binary stream of TmNS Data Messages from a pipe, and writes the decoded
+        measurements in output_format (see make_measurement_sink) """
 
     if os.path.exists(stream_of_data) is False:
         print("\nNo pipe or file exists.")
 
     # Loop over reading the pipe, parsing out the TDMs and sending over the network when a TDM is completely read
-    tdm_cnt = 0
     print("Input '{0}' has been opened for reading.  Waiting for writer to connect.".format(stream_of_data))
     input_file_or_pipe = open(stream_of_data, 'rb')
     print("Connected to input '{0}'.  Reading binary TDMs from input.".format(stream_of_data))
@@ -117,30 +124,14 @@ def realtime_tdm_stream_to_network_output(stream_of_data: str, package_decoders:
     mydir = os.path.join(os.getcwd(), 'measurements/', datetime.now().strftime('%Y-%m-%d_%H-%M-%S'))
     os.makedirs(mydir)
 
+    # Everything read is written out before waiting on the pipe for more, and at least every REALTIME_FLUSH_SEC
+    # while data keeps arriving, so slow measurements reach the disk while the stream runs
+    sink = make_measurement_sink(mydir, output_format, flush_sec=REALTIME_FLUSH_SEC)
     try:
-        data_stream = TmnsPcapReader(input_file_or_pipe)
-
-        count = 0
-        while True:
-            message = data_stream.get_message()
-
-            if message is None:
-                break
-
-            count = count + 1
-            for package in message.packages:
-                package_time = message.time_nanosec + package.time_delta + (message.time_sec * 1e9)
-                payload = bitarray()
-                payload.frombytes(package.payload)
-                measurements = package_decoders[package.pdid](payload, package_time)
-                cnt_key = 0
-                for _measurement_name, value in measurements.items():
-                    with open(str(mydir) + '/' + str(_measurement_name) + r'.csv', 'a') as csvfile:
-                        cnt_key = cnt_key + 1
-                        csv_out = csv.writer(csvfile)
-                        csv_out.writerow(['value', 'timestamp'])
-                        for row in value:
-                            csv_out.writerow(row)
+        packages = iter_packages(iter_messages(input_file_or_pipe, on_wait=sink.flush))
+        for _measurement_name, value in iter_measurements(packages, package_decoders):
+            sink.write(_measurement_name, value)
+            sink.maybe_flush()
     except IOError as e:
         if e.errno == errno.EPIPE:
             print("Looks like the pipe closed.  Closing the pipe and will reopen it for listening.")
@@ -151,10 +142,59 @@ def realtime_tdm_stream_to_network_output(stream_of_data: str, package_decoders:
     except ValueError:
         print("\nPipe Writer has closed.  Closing our Pipe Reader.")
         input_file_or_pipe.close()
+    finally:
+        sink.close()
+
+
+def bulk_decode_tdm_file(bfile, package_decoders, batch_packages=BULK_BATCH_PACKAGES):
+    """ This function decodes a binary file (bfile) of TmNS Data Messages in batches: packages are
+        grouped by PDID, and every batch_packages packages of a PDID are decoded at once with NumPy
+        (TmnsPackagePlan.decode_batch).  It yields {measurement name: (values, timestamps)} of
+        each batch, with integer timestamps in ns."""
+
+    batches = defaultdict(lambda: ([], []))
+
+    with open(bfile, mode='rb') as f:
+        reader = TmnsPcapReader(f)
+        for _message, package, package_time in iter_packages(reader.iter_messages()):
+            plan = package_decoders.get(package.pdid)
+            if plan is None:
+                continue
+            payloads, times = batches[package.pdid]
+            # A payload read from a pipe is only valid until the next message is read, so batch a copy
+            payloads.append(package.payload if reader.map is not None else bytes(package.payload))
+            times.append(package_time)
+            if len(payloads) >= batch_packages:
+                yield plan.decode_batch(payloads, times)
+                del payloads[:], times[:]
+
+    for pdid, (payloads, times) in batches.items():
+        if payloads:
+            yield package_decoders[pdid].decode_batch(payloads, times)
+
+
+def bulk_tdm_file_to_csv(bfile: str, package_decoders: {}, output_format: str = 'csv'):
+    """ This function decodes a binary file of TmNS Data Messages with bulk_decode_tdm_file, and
+        appends each batch's measurements to the measurement CSV files (or the measurement store
+        of another output_format) """
+
+    if os.path.exists(bfile) is False:
+        print("The file '{0}' was not found.".format(bfile))
+        return
+
+    # creates a new folder to save measurements into each time
+    mydir = os.path.join(os.getcwd(), 'measurements/', datetime.now().strftime('%Y-%m-%d_%H-%M-%S'))
+    os.makedirs(mydir)
+
+    with make_measurement_sink(mydir, output_format) as sink:
+        for measurements in bulk_decode_tdm_file(bfile, package_decoders):
+            for _measurement_name, (values, timestamps) in measurements.items():
+                sink.write_arrays(_measurement_name, values, timestamps)
 
 
 def preprocess_mdl(mdl=None):
-    """Reads MDL to extract expected measurement."""
+    """Reads MDL to extract expected measurement.  Each PDID's package layout is compiled once into a
+    TmnsPackagePlan; returns {pdid: plan}, where plan(payload, start_time) decodes one package."""
 
     package_decoders = {}
 
@@ -162,53 +202,40 @@ def preprocess_mdl(mdl=None):
         print("MDL file is missing. Cannot decode.")
         sys.exit(-1)
 
-    # Parse MDL file, and create the mapping between MDIDs and their associated Multicast IP Address
+    # Parse MDL file, and index the elements the packages refer to by ID, so each reference is a dictionary lookup
     mdl_parser = etree.XMLParser(remove_blank_text=True)
     root = etree.parse(mdl, mdl_parser)
 
+    packages = {p.get("ID"): p for p in root.xpath("//mdl:PackageDefinition", **n)}
+    data_structures = {d.get("ID"): d for d in root.xpath("//mdl:DataStructure", **n)}
+    measurement_names = {m.get("ID"): m.findtext("mdl:Name", **n) for m in root.xpath("//mdl:Measurement", **n)}
+    missing_measurements = set()
+
     messages = root.xpath("//mdl:MessageDefinition", namespaces=ns)
     for message in messages:
         package_ids = message.xpath(".//mdl:PackageDefinitionRef/@IDREF", **n)
         for package_id in package_ids:
-            try:
-                package = root.xpath("//mdl:PackageDefinition[@ID = '{}']".format(package_id), **n)[0]
-            except IndexError:
-                print("Your file is bad.")
-                os.exit(-1)
-
-            data_structure_id = package.xpath("mdl:DataStructureRef/@IDREF", **n)[0]
-            # data_structure_id = package.find("mdl:DataStructureRef", **n).get(IDREF)
-            try:
-                data_structure = root.xpath("//mdl:DataStructure[@ID = '{}']".format(data_structure_id), **n)[0]
-            except IndexError:
-                print("Your file is bad.")
+            package = packages.get(package_id)
+            if package is None:
+                print("Your file is bad.  PackageDefinition '{}' is missing.".format(package_id))
                 sys.exit(-1)
 
             pdid = int(package.find("mdl:PackageDefinitionID", **n).text, base=16)
+            if pdid in package_decoders:
+                continue
 
-            def package_decoder(package_bits: bitarray, start_time: int, data_structure=data_structure, package=package):
-                field_info = get_field_info(data_structure, package)
-                measurement_results = defaultdict(list)
-                current_time = start_time
-
-                package_bits = memoryview(bytes(package_bits))
-
-                while len(package_bits):  # there's bits left
-                    next_field = next(field_info)
-
-                    amt = int(next_field.width/8)
-                    measurement_bytes = bytes(package_bits[:amt])
-
-                    if next_field.measurement_name is not None:
-                        measurement_results[next_field.measurement_name.text].append((int.from_bytes(measurement_bytes, byteorder="big"), current_time))
-                        # todo: do this the right way by pulling the TimeOffsetIncrement from the DataWordToFieldMap
-                        # hardcoded offset value because our file doesn't have it, but we know it experimentally (~8khz)
-                        current_time += .000125
-
-                    package_bits = package_bits[next_field.width:]
+            data_structure_id = package.xpath("mdl:DataStructureRef/@IDREF", **n)[0]
+            data_structure = data_structures.get(data_structure_id)
+            if data_structure is None:
+                # Packages of this PDID have no decoder, and are skipped
+                print("DataStructure '{}' of PackageDefinition '{}' is missing.  Its packages will not be "
+                      "decoded.".format(data_structure_id, package_id))
+                continue
 
-                return measurement_results
+            plan = compile_package_plan(pdid, package, data_structure, measurement_names, missing_measurements)
+            package_decoders[pdid] = plan
 
-            package_decoders[pdid] = package_decoder
+    if missing_measurements:
+        print("Measurements {} are missing.  They will not be decoded.".format(", ".join(sorted(missing_measurements))))
 
-    return package_decoders
\ No newline at end of file
+    return package_decoders
@@ -1,4 +1,7 @@
-class TmnsDataField:
-    def __init__(self, width, measurement_name=None):
-        self.width = width
-        self.measurement_name = measurement_name
+from collections import namedtuple
+
+# One field of a package's data structure that is mapped to a measurement, as compiled from the MDL.  Offsets and
+# widths are in bits from the start of the package payload, times in nanoseconds.  A field with repetitions == 0
+# repeats until the end of the payload.
+TmnsDataField = namedtuple("TmnsDataField", ["width", "measurement_name", "offset", "repetitions",
+                                             "offset_increment", "time_offset", "time_increment"])
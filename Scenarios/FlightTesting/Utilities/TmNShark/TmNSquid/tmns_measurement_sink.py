@@ -0,0 +1,99 @@
+import csv
+import os
+import time
+from collections import OrderedDict
+
+
+MAX_OPEN_FILES = 256            # measurement files kept open at once (least recently written closed first)
+BATCH_ROWS = 4096               # rows of a measurement held before they are written
+FILE_BUFFER_SIZE = 1 << 16      # bytes buffered per open file
+REALTIME_FLUSH_SEC = 1.0        # longest a row is held before it is written, when reading a live stream
+
+
+class TmnsMeasurementSink:
+    """Writes decoded measurements to one CSV file per measurement (<directory>/<measurement name>.csv).
+
+    Each file gets its 'value,timestamp' header once.  Rows are held per measurement and written BATCH_ROWS at a
+    time through a buffered handle; at most MAX_OPEN_FILES handles are open, the least recently used is closed (and
+    reopened for append) when another is needed.  With flush_sec, maybe_flush() also writes everything held once
+    flush_sec seconds have passed since the last flush, so a slow measurement still reaches the disk in time.  Use
+    as a context manager, or call close(), to write what is left.
+    """
+
+    def __init__(self, directory, max_open_files=MAX_OPEN_FILES, batch_rows=BATCH_ROWS, flush_sec=None):
+        self.directory = directory
+        self.max_open_files = max(1, max_open_files)
+        self.batch_rows = batch_rows
+        self.flush_sec = flush_sec
+        self.last_flush = time.monotonic()
+        self.handles = OrderedDict()    # measurement name -> open file, least recently used first
+        self.pending = {}               # measurement name -> rows not yet written
+        self.started = set()            # measurements whose file has its header
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def path(self, name):
+        return os.path.join(self.directory, str(name) + '.csv')
+
+    def write(self, name, rows):
+        """Adds (value, timestamp) rows of a measurement."""
+        pending = self.pending.setdefault(name, [])
+        pending.extend(rows)
+        if len(pending) >= self.batch_rows:
+            self._write_rows(name)
+
+    def write_arrays(self, name, values, timestamps):
+        """Adds the rows of a measurement given as NumPy arrays of integer values and timestamps."""
+        import numpy as np
+
+        if self.pending.get(name):
+            self._write_rows(name)
+        # A record per row keeps each column's own type (a 2-D array of uint64 values and int64 timestamps would be
+        # float64), so values of 2**63 and above are written in full
+        rows = np.empty(len(values), dtype=[('value', values.dtype), ('timestamp', timestamps.dtype)])
+        rows['value'] = values
+        rows['timestamp'] = timestamps
+        np.savetxt(self._handle(name), rows, fmt='%d', delimiter=',', newline='\r\n')
+
+    def maybe_flush(self):
+        # Flushes if flush_sec seconds have passed since the last flush
+        if (self.flush_sec is not None) and ((time.monotonic() - self.last_flush) >= self.flush_sec):
+            self.flush()
+
+    def flush(self):
+        for name in list(self.pending):
+            if self.pending[name]:
+                self._write_rows(name)
+        for f in self.handles.values():
+            f.flush()
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        for f in self.handles.values():
+            f.close()
+        self.handles.clear()
+
+    def _write_rows(self, name):
+        csv.writer(self._handle(name)).writerows(self.pending[name])
+        self.pending[name] = []
+
+    def _handle(self, name):
+        f = self.handles.get(name)
+        if f is not None:
+            self.handles.move_to_end(name)
+            return f
+
+        if len(self.handles) >= self.max_open_files:
+            _, oldest = self.handles.popitem(last=False)
+            oldest.close()
+        f = open(self.path(name), 'a', newline='', buffering=FILE_BUFFER_SIZE)
+        if name not in self.started:
+            f.write('value,timestamp\r\n')
+            self.started.add(name)
+        self.handles[name] = f
+        return f
@@ -0,0 +1,274 @@
+import importlib.util
+import json
+import os
+import time
+
+from TmNShark.TmNSquid.tmns_measurement_sink import TmnsMeasurementSink
+
+
+# Output formats of the decoded measurements: CSV files (TmnsMeasurementSink), or a columnar measurement store of
+# chunked (timestamp, value) columns per measurement, one file per chunk.  arrow (Arrow IPC files) and parquet need
+# pyarrow; without it the store falls back to npy.
+OUTPUT_FORMATS = ('csv', 'npy', 'arrow', 'parquet')
+FILE_EXTENSIONS = {'npy': '.npy', 'arrow': '.arrow', 'parquet': '.parquet'}
+
+CHUNK_ROWS = 65536              # rows of a measurement written as one chunk file
+INDEX_FILE = 'index.jsonl'      # log of the store's format, and the files and chunks of each measurement
+OPEN_CHUNK_EXTENSION = '.part'  # raw records of a measurement's chunk in progress, appended to by flush()
+RECORD_DTYPE = [('timestamp', '<i8'), ('value', '<u8')]
+
+
+def make_measurement_sink(directory, output_format='csv', flush_sec=None):
+    """Returns the writer of decoded measurements in output_format (see OUTPUT_FORMATS) into directory.  Both kinds
+    have write(name, rows), write_arrays(name, values, timestamps), maybe_flush() (a flush at most every flush_sec
+    seconds) and close(), and are context managers."""
+    if output_format == 'csv':
+        return TmnsMeasurementSink(directory, flush_sec=flush_sec)
+    return TmnsMeasurementStore(directory, output_format, flush_sec=flush_sec)
+
+
+def store_file_name(name):
+    # A file name for a measurement name (which may hold path separators)
+    return "".join(c if (c.isalnum() or c in " -_") else '_' for c in str(name))
+
+
+class TmnsMeasurementStore:
+    """Writes decoded measurements as chunked (timestamp, value) columns, one directory of chunk files per
+    measurement, with an index of each chunk's rows and time range (see load_measurements).
+
+    The index is a log of JSON lines, appended to when a measurement is added and after every chunk, so a store
+    whose writer dies is readable up to its last complete chunk.  flush() (or maybe_flush(), once flush_sec seconds
+    have passed since the last flush) appends the pending rows to each measurement's open chunk file
+    (<chunk>.part, raw RECORD_DTYPE records, also read by load_measurements) rather than starting a chunk, so a
+    live store still gets one chunk file per chunk_rows rows.  No file is held open between writes.
+    """
+
+    def __init__(self, directory, output_format='npy', chunk_rows=CHUNK_ROWS, flush_sec=None):
+        if (output_format in ('arrow', 'parquet')) and (importlib.util.find_spec('pyarrow') is None):
+            print("pyarrow is not installed.  Writing the measurements as chunked .npy files instead of "
+                  "{}.".format(output_format))
+            output_format = 'npy'
+        if output_format not in FILE_EXTENSIONS:
+            raise ValueError("Unknown measurement store format '{}': use npy, arrow or parquet".format(output_format))
+
+        self.directory = directory
+        self.format = output_format
+        self.chunk_rows = chunk_rows
+        self.flush_sec = flush_sec
+        self.last_flush = time.monotonic()
+        self.pending = {}       # measurement name -> [list of (values, timestamps) arrays, rows, arrays in .part]
+        self.index = {}         # measurement name -> {"File": directory, "Chunks": [{"Rows", "Start", "End"}, ...]}
+        self.logged_format = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, name, rows):
+        """Adds (value, timestamp) rows of a measurement."""
+        import numpy as np
+
+        rows = np.array(rows, dtype=np.uint64).reshape(-1, 2)
+        self.write_arrays(name, rows[:, 0], rows[:, 1].astype(np.int64))
+
+    def write_arrays(self, name, values, timestamps):
+        """Adds the rows of a measurement given as NumPy arrays of integer values and timestamps (ns)."""
+        import numpy as np
+
+        pending = self.pending.setdefault(name, [[], 0, 0])
+        pending[0].append((np.asarray(values, dtype=np.uint64), np.asarray(timestamps, dtype=np.int64)))
+        pending[1] += len(timestamps)
+        if pending[1] >= self.chunk_rows:
+            self._write_chunk(name)
+
+    def maybe_flush(self):
+        # Flushes if flush_sec seconds have passed since the last flush
+        if (self.flush_sec is not None) and ((time.monotonic() - self.last_flush) >= self.flush_sec):
+            self.flush()
+
+    def flush(self):
+        # Appends every measurement's rows not yet on disk to its open chunk file
+        import numpy as np
+
+        for name, pending in self.pending.items():
+            arrays, _rows, on_disk = pending
+            if on_disk == len(arrays):
+                continue
+            records = make_records(np.concatenate([v for v, _ in arrays[on_disk:]]),
+                                   np.concatenate([t for _, t in arrays[on_disk:]]))
+            with open(self._chunk_path(name, OPEN_CHUNK_EXTENSION), 'ab') as f:
+                records.tofile(f)
+            pending[2] = len(arrays)
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        # Writes every measurement's pending rows as a (possibly short) last chunk
+        for name in list(self.pending):
+            if self.pending[name][1]:
+                self._write_chunk(name)
+
+    def _log(self, record):
+        # Appends a line to the index log, the store's format first
+        with open(os.path.join(self.directory, INDEX_FILE), 'a') as f:
+            if not self.logged_format:
+                f.write(json.dumps({"Format": self.format}) + '\n')
+                self.logged_format = True
+            f.write(json.dumps(record) + '\n')
+
+    def _chunk_path(self, name, extension):
+        # The path of the measurement's next chunk (with extension), adding the measurement to the index if new
+        entry = self.index.get(name)
+        if entry is None:
+            entry = self.index[name] = {"File": self._unique_file(name), "Chunks": []}
+            os.makedirs(os.path.join(self.directory, entry["File"]), exist_ok=True)
+            self._log({"Measurement": name, "File": entry["File"]})
+        return os.path.join(self.directory, entry["File"], chunk_file_name(len(entry["Chunks"]), extension))
+
+    def _write_chunk(self, name):
+        import numpy as np
+
+        arrays, _rows, on_disk = self.pending[name]
+        values = np.concatenate([v for v, _ in arrays])
+        timestamps = np.concatenate([t for _, t in arrays])
+        self.pending[name] = [[], 0, 0]
+        if len(timestamps) == 0:
+            return
+
+        chunk_file = self._chunk_path(name, FILE_EXTENSIONS[self.format])
+        open_chunk_file = os.path.splitext(chunk_file)[0] + OPEN_CHUNK_EXTENSION
+
+        if self.format == 'npy':
+            np.save(chunk_file, make_records(values, timestamps))
+        else:
+            import pyarrow as pa
+
+            batch = pa.record_batch([pa.array(timestamps), pa.array(values)], names=['timestamp', 'value'])
+            if self.format == 'arrow':
+                with pa.ipc.new_file(chunk_file, batch.schema) as writer:
+                    writer.write_batch(batch)
+            else:
+                import pyarrow.parquet as pq
+                pq.write_table(pa.Table.from_batches([batch]), chunk_file)
+
+        # The chunk is in the index before its open chunk file goes, so a reader always finds the rows in one of them
+        chunk = {"Rows": len(timestamps), "Start": int(timestamps.min()), "End": int(timestamps.max())}
+        self.index[name]["Chunks"].append(chunk)
+        self._log(dict({"Measurement": name}, **chunk))
+        if on_disk:
+            os.remove(open_chunk_file)
+
+    def _unique_file(self, name):
+        base = store_file_name(name)
+        taken = {entry["File"] for entry in self.index.values()}
+        file_name = base
+        i = 1
+        while file_name in taken:
+            file_name = "{}-{}".format(base, i)
+            i += 1
+        return file_name
+
+
+def chunk_file_name(chunk, extension):
+    return '{}{}'.format(chunk, extension)
+
+
+def make_records(values, timestamps):
+    import numpy as np
+
+    records = np.empty(len(timestamps), dtype=RECORD_DTYPE)
+    records['timestamp'] = timestamps
+    records['value'] = values
+    return records
+
+
+# ------------------------------------------------------------------------------
+
+
+def read_index(directory):
+    """Reads a measurement store's index log.
+
+    returns (format, {measurement name: {"File": directory, "Chunks": [{"Rows", "Start", "End"}, ...]}})
+    """
+    output_format = None
+    measurements = {}
+    with open(os.path.join(directory, INDEX_FILE)) as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break           # still being written
+            record = json.loads(line)
+            if "Format" in record:
+                output_format = record["Format"]
+            elif "File" in record:
+                measurements[record["Measurement"]] = {"File": record["File"], "Chunks": []}
+            else:
+                name = record.pop("Measurement")
+                measurements[name]["Chunks"].append(record)
+    return output_format, measurements
+
+
+def list_measurements(directory):
+    """The names of the measurements in a measurement store."""
+    return sorted(read_index(directory)[1])
+
+
+def load_measurements(directory, names=None, start=None, end=None):
+    """Loads measurements from a measurement store written by TmnsMeasurementStore.
+
+    names selects the measurements (default: all of them), and start and end (ns, inclusive) a time slice.  Only
+    the chunks of the selected measurements whose time range overlaps the slice are read, and the open chunk of a
+    store still being written.
+
+    returns {measurement name: (values, timestamps)}, NumPy arrays in the order they were written
+    """
+    import numpy as np
+
+    output_format, measurements = read_index(directory)
+    if names is None:
+        names = sorted(measurements)
+
+    results = {}
+    for name in names:
+        entry = measurements.get(name)
+        if entry is None:
+            raise KeyError("Measurement '{}' is not in the store {}".format(name, directory))
+        path = os.path.join(directory, entry["File"])
+        chunks = [i for i, chunk in enumerate(entry["Chunks"])
+                  if ((start is None) or (chunk["End"] >= start)) and ((end is None) or (chunk["Start"] <= end))]
+
+        parts = []
+        for i in chunks:
+            chunk_file = os.path.join(path, chunk_file_name(i, FILE_EXTENSIONS[output_format]))
+            if output_format == 'npy':
+                table = np.load(chunk_file, mmap_mode='r')
+                parts.append((table['timestamp'], table['value']))
+            elif output_format == 'arrow':
+                import pyarrow as pa
+                with pa.memory_map(chunk_file) as source:
+                    table = pa.ipc.open_file(source).read_all()
+                parts.append((table.column('timestamp').to_numpy(), table.column('value').to_numpy()))
+            else:
+                import pyarrow.parquet as pq
+                table = pq.read_table(chunk_file)
+                parts.append((table.column('timestamp').to_numpy(), table.column('value').to_numpy()))
+
+        open_chunk_file = os.path.join(path, chunk_file_name(len(entry["Chunks"]), OPEN_CHUNK_EXTENSION))
+        try:
+            size = os.path.getsize(open_chunk_file)
+            # A record being appended is left out
+            table = np.fromfile(open_chunk_file, dtype=RECORD_DTYPE, count=size // np.dtype(RECORD_DTYPE).itemsize)
+            parts.append((table['timestamp'], table['value']))
+        except FileNotFoundError:
+            pass                # no open chunk, or it has just been written as a chunk
+
+        timestamps = np.concatenate([t for t, _ in parts]) if parts else np.zeros(0, dtype=np.int64)
+        values = np.concatenate([v for _, v in parts]) if parts else np.zeros(0, dtype=np.uint64)
+        keep = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            keep &= (timestamps >= start)
+        if end is not None:
+            keep &= (timestamps <= end)
+        results[name] = (values[keep], timestamps[keep])
+
+    return results
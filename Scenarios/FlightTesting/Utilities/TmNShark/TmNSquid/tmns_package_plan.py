@@ -0,0 +1,207 @@
+import struct
+from collections import defaultdict, namedtuple
+
+
+# Time between the samples of a repeated field when its DataWordToFieldMap has no TimeOffsetIncrement.  This is the
+# ~8 kHz rate the decoder has always assumed for our captures.
+DEFAULT_TIME_OFFSET_INCREMENT = 125000  # ns
+
+# struct codes and NumPy dtypes of the widths that can be read as whole big-endian unsigned integers
+STRUCT_CODES = {8: 'B', 16: 'H', 32: 'I', 64: 'Q'}
+NUMPY_DTYPES = {8: 'u1', 16: '>u2', 32: '>u4', 64: '>u8'}
+
+
+# How one field is read: fields on byte boundaries with a struct width use item (a Struct of one sample), and block
+# (a Struct of all of them, when they are a fixed number of adjacent samples).  Any other field is read bit by bit,
+# with positions holding (first byte, end byte, right shift) of each sample when the number of samples is fixed.
+FieldLayout = namedtuple("FieldLayout", ["field", "item", "block", "dtype", "positions", "mask"])
+
+
+class TmnsPackagePlan:
+    """The decode plan of one PDID: the layout of its measurement fields, compiled once from the MDL.
+
+    decode(payload, start_time) (or calling the plan) does no XML work; it returns
+    {measurement name: [(value, timestamp), ...]}.  decode_batch(payloads, start_times) decodes many payloads of the
+    PDID at once with NumPy, or with decode() when a field is too wide to gather in a uint64 (batchable is False).
+    """
+
+    def __init__(self, pdid, name, fields):
+        self.pdid = pdid
+        self.name = name
+        self.fields = tuple(fields)
+        self.layouts = tuple(self._layout(field) for field in self.fields)
+        self.batchable = all(batch_window(layout) <= 8 for layout in self.layouts)
+        self.batch_indices = {}     # payload length -> NumPy byte indices of each field, filled by decode_batch
+
+    def __call__(self, payload, start_time):
+        return self.decode(payload, start_time)
+
+    @staticmethod
+    def _layout(field):
+        mask = (1 << field.width) - 1
+        if (field.width in STRUCT_CODES) and (field.offset % 8 == 0) and (field.offset_increment % 8 == 0):
+            code = STRUCT_CODES[field.width]
+            item = struct.Struct('>' + code)
+            block = None
+            if (field.repetitions > 0) and (field.offset_increment == field.width):
+                block = struct.Struct('>{}{}'.format(field.repetitions, code))
+            return FieldLayout(field, item, block, NUMPY_DTYPES[field.width], None, mask)
+
+        positions = None
+        if field.repetitions > 0:
+            positions = tuple(bit_position(field.offset + (i * field.offset_increment), field.width)
+                              for i in range(field.repetitions))
+        return FieldLayout(field, None, None, None, positions, mask)
+
+    def sample_count(self, field, payload_bytes):
+        # Number of samples of a field that fit in a payload of payload_bytes bytes
+        if payload_bytes * 8 < field.offset + field.width:
+            return 0
+        fit = ((payload_bytes * 8 - field.offset - field.width) // field.offset_increment) + 1
+        return fit if field.repetitions == 0 else min(fit, field.repetitions)
+
+    def decode(self, payload, start_time):
+        results = defaultdict(list)
+        payload_bytes = len(payload)
+
+        for field, item, block, _dtype, positions, mask in self.layouts:
+            count = self.sample_count(field, payload_bytes)
+            if count == 0:
+                continue
+
+            if item is not None:
+                start = field.offset // 8
+                stride = field.offset_increment // 8
+                if (block is not None) and (count == field.repetitions):
+                    values = block.unpack_from(payload, start)
+                elif stride == item.size:
+                    values = [v for (v,) in item.iter_unpack(payload[start:start + (count * stride)])]
+                else:
+                    values = [item.unpack_from(payload, start + (i * stride))[0] for i in range(count)]
+            else:
+                if positions is None:
+                    positions = [bit_position(field.offset + (i * field.offset_increment), field.width)
+                                 for i in range(count)]
+                values = [(int.from_bytes(payload[first:end], byteorder='big') >> shift) & mask
+                          for first, end, shift in positions[:count]]
+
+            time = start_time + field.time_offset
+            step = field.time_increment
+            results[field.measurement_name].extend((value, time + (i * step)) for i, value in enumerate(values))
+
+        return results
+
+    def decode_batch(self, payloads, start_times):
+        """Decodes a batch of payloads of this PDID with NumPy: each field of each distinct payload length is one
+        gather from a (payloads, bytes) array, then a big-endian to native conversion (or, for fields not on byte
+        boundaries, a shift and mask).  start_times are the integer package times in ns.
+
+        returns {measurement name: (values, timestamps)}, arrays of the rows in the order decode() gives them for
+        the payloads one after another (package, then field, then sample)
+        """
+        import numpy as np
+
+        if not self.batchable:
+            return self._decode_each(payloads, start_times)
+
+        start_times = np.asarray(start_times, dtype=np.int64)
+        rows_by_length = defaultdict(list)
+        for row, payload in enumerate(payloads):
+            rows_by_length[len(payload)].append(row)
+
+        parts = defaultdict(list)     # measurement name -> [(values, timestamps, order keys), ...]
+        max_samples = max(rows_by_length, default=0) * 8 + 1      # more than any field's samples in a payload
+        for length, rows in rows_by_length.items():
+            data = np.frombuffer(b"".join(payloads[row] for row in rows), dtype=np.uint8).reshape(len(rows), length)
+            times = start_times[rows]
+            rows = np.asarray(rows, dtype=np.int64)
+            for field_index, (layout, indices) in enumerate(zip(self.layouts, self._batch_indices(length))):
+                if indices is None:
+                    continue
+                field = layout.field
+                if layout.item is not None:
+                    values = np.ascontiguousarray(data[:, indices]).view(layout.dtype).reshape(len(rows), -1)
+                    values = values.astype(values.dtype.newbyteorder('='))
+                else:
+                    indices, shifts = indices
+                    window = data[:, indices].astype(np.uint64)
+                    values = np.zeros(window.shape[:2], dtype=np.uint64)
+                    for k in range(window.shape[2]):
+                        values = (values << np.uint64(8)) | window[:, :, k]
+                    values = (values >> shifts) & np.uint64(layout.mask)
+                offsets = field.time_offset + (np.arange(values.shape[1], dtype=np.int64) * field.time_increment)
+                stamps = times[:, None] + offsets
+                # Position of each row in decode() order: (package, field, sample)
+                keys = ((rows[:, None] * len(self.layouts)) + field_index) * max_samples + \
+                    np.arange(values.shape[1], dtype=np.int64)
+                parts[field.measurement_name].append((values.ravel(), stamps.ravel(), keys.ravel()))
+
+        results = {}
+        for name, chunks in parts.items():
+            values = np.concatenate([v for v, _, _ in chunks])
+            stamps = np.concatenate([t for _, t, _ in chunks])
+            if len(chunks) > 1:     # one chunk is already in order
+                order = np.argsort(np.concatenate([k for _, _, k in chunks]), kind='stable')
+                values, stamps = values[order], stamps[order]
+            results[name] = (values, stamps)
+        return results
+
+    def _decode_each(self, payloads, start_times):
+        # decode_batch() with decode(), for plans with a field too wide to decode in a batch
+        import numpy as np
+
+        rows = defaultdict(list)
+        for payload, start_time in zip(payloads, start_times):
+            for name, samples in self.decode(payload, int(start_time)).items():
+                rows[name].extend(samples)
+        return {name: (np.array([v for v, _ in samples], dtype=np.uint64),
+                       np.array([t for _, t in samples], dtype=np.int64)) for name, samples in rows.items()}
+
+    def _batch_indices(self, length):
+        # Per field, the byte indices of its samples in a payload of length bytes (a slice, or a (samples, bytes)
+        # array), and for fields not on byte boundaries also the right shift of each sample; None for fields with no
+        # samples.
+        if length in self.batch_indices:
+            return self.batch_indices[length]
+        import numpy as np
+
+        indices = []
+        for field, item, _block, _dtype, _positions, _mask in self.layouts:
+            count = self.sample_count(field, length)
+            if count == 0:
+                indices.append(None)
+                continue
+            bit_offsets = field.offset + (np.arange(count, dtype=np.int64) * field.offset_increment)
+            if item is not None:
+                start = field.offset // 8
+                if field.offset_increment == field.width:
+                    indices.append(slice(start, start + (count * item.size)))     # adjacent samples: a view
+                else:
+                    indices.append((bit_offsets // 8)[:, None] + np.arange(item.size))
+                continue
+            # A window of the same number of bytes for every sample (at most 8: see batchable)
+            first = bit_offsets // 8
+            size = int(((bit_offsets + field.width + 7) // 8 - first).max())
+            window = np.minimum(first[:, None] + np.arange(size), length - 1)
+            shifts = ((first + size) * 8 - (bit_offsets + field.width)).astype(np.uint64)
+            indices.append((window, shifts))
+
+        self.batch_indices[length] = indices
+        return indices
+
+
+def batch_window(layout):
+    # Bytes decode_batch gathers per sample of a field: the widest (first byte, end byte) span of its samples, for
+    # fields not on byte boundaries (the bit offsets of the samples repeat every 8 samples)
+    field = layout.field
+    if layout.item is not None:
+        return 0
+    spans = (bit_position(field.offset + (i * field.offset_increment), field.width) for i in range(8))
+    return max(end - first for first, end, _shift in spans)
+
+
+def bit_position(offset, width):
+    # (first byte, end byte, right shift) of a big-endian field of width bits at bit offset
+    first = offset // 8
+    end = (offset + width + 7) // 8
+    return first, end, (end * 8) - (offset + width)
@@ -1,90 +1,164 @@
+import io
+import mmap
+import os
+import select
+import stat
+import struct
 from typing import BinaryIO
 
 from TmNShark.TmNSquid.tmns_message import TmnsDataMessage
 from TmNShark.TmNSquid.tmns_package import TmnsPackage
 
 
+# version/ADF words, reserved, flags, MDID, sequence number, message length, seconds, nanoseconds
+MESSAGE_HEADER = struct.Struct('>BBHIIIII')
+# PDID, package length, reserved, status flags, time delta
+PACKAGE_HEADER = struct.Struct('>IHBBI')
+
+READ_BUFFER_SIZE = 1 << 20  # bytes read from a pipe at a time
+
+
 class TmnsPcapReader:
-    def __init__(self, pcap: BinaryIO):
+    """Reads TmNS Data Messages from a binary file or pipe of TDMs.
+
+    Regular files are memory-mapped; pipes are read with readinto() into one reusable buffer.  Headers are parsed
+    with precompiled structs, and package payloads are memoryview slices of the map or buffer, not copies.  The
+    payloads of a message read from a pipe are only valid until the next get_message() call (get_messages() copies
+    them).  on_wait, if given, is called before a read from a pipe that has no data yet, i.e. one that would block
+    (e.g. to flush the output of what has been read so far).
+    """
+
+    def __init__(self, pcap: BinaryIO, buffer_size: int = READ_BUFFER_SIZE, on_wait=None):
         self.pcap = pcap
+        self.on_wait = on_wait
+        self.pos = 0        # start of the unread data in view
+        self.end = 0        # end of the data in view
+
+        self.map = None
+        if is_mappable(pcap):
+            self.map = mmap.mmap(pcap.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self.map)
+            self.pos = pcap.tell()
+            self.end = len(self.map)
+        else:
+            self.buffer = bytearray(buffer_size)
+            self.view = memoryview(self.buffer)
 
     def get_messages(self):
+        # Every message in a list; iter_messages() reads them one at a time instead.  Payloads read from a pipe are
+        # copied out of the reused buffer, as they are kept past the next get_message() call.
         messages = []
+        for message in self.iter_messages():
+            if self.map is None:
+                for package in message.packages:
+                    package.payload = bytes(package.payload)
+            messages.append(message)
+        print("Message is none now.")
+        return messages
+
+    def iter_messages(self):
         while True:
             message = self.get_message()
             if message is None:
-                print("Message is none now.")
-                break
-            messages.append(message)
-        return messages
+                return
+            yield message
 
     def get_message(self):
-        try:
-            # find beginning of message
-            # make message
-            version_and_words = self._read(1)
-            ver = int.from_bytes(version_and_words, byteorder='big') >> 4
-            adf_words = int.from_bytes(version_and_words, byteorder='big') & 0x0f
-            # skipping 4 reserved bits
-            # skipping 4 bits of useless message type
-            self._read(1)
-            flags = int.from_bytes(self._read(2), byteorder='big')
-            mdid = int.from_bytes(self._read(4), byteorder='big')
-            seqno = int.from_bytes(self._read(4), byteorder='big')
-            msglen = int.from_bytes(self._read(4), byteorder='big')  # provides message length in bytes
-            secs = int.from_bytes(self._read(4), byteorder='big')
-            nanosecs = int.from_bytes(self._read(4), byteorder='big')
-
-            adf_payload = 0
-            adf_size = (adf_words * 4)
-            if adf_words > 0:
-                adf_payload = int.from_bytes(self._read(adf_size), byteorder='big') # convert to bits and then count the words
-
-            packages = []
-            position = 24 + adf_payload
-            while position < msglen:
-                package = self.get_package()
-
-                if package is None:
-                    break
-
-                packages.append(package)
-                position = position + package.length
-
-            message = TmnsDataMessage(version=ver, adf_words=adf_words,
-                                      flags=flags, mdid=mdid,
-                                      sequence_number=seqno, length=msglen,
-                                      secs=secs, nanosecs=nanosecs,
-                                      adf_payload=adf_payload, packages=packages)
-
-            return message
-
-        except EOFError:
+        if not self._fill(MESSAGE_HEADER.size):
             return None
-        
-    def get_package(self):
-        try:
-            package_id = int.from_bytes(self._read(4), byteorder='big')
-            package_length = int.from_bytes(self._read(2), byteorder='big')
-            _ = int.from_bytes(self._read(1), byteorder='big')
-            package_status_flags = int.from_bytes(self._read(1), byteorder='big')
-            package_time_delta = int.from_bytes(self._read(4), byteorder='big')
-            package_payload_len = package_length - 12
-            if package_payload_len < 0:
-                return None
-            package_payload = self._read(package_payload_len)
-
-            package = TmnsPackage(pdid=package_id, length=package_length,
-                                  status_flags=package_status_flags,
-                                  time_delta=package_time_delta, payload=package_payload)
-            return package
-
-        except EOFError:
+        (version_and_words, _, flags, mdid, seqno, msglen, secs,
+         nanosecs) = MESSAGE_HEADER.unpack_from(self.view, self.pos)
+        ver = version_and_words >> 4
+        adf_words = version_and_words & 0x0f
+        hdrlen = MESSAGE_HEADER.size + (adf_words * 4)
+        if (msglen < hdrlen) or not self._fill(msglen):
             return None
 
-    def _read(self, byte_count: int):
-        bytes_input = self.pcap.read(byte_count)
-        if not bytes_input:
-            raise EOFError('Stream is empty.')
+        view = self.view
+        start = self.pos
+        self.pos += msglen
+
+        adf_payload = 0
+        if adf_words > 0:
+            adf_payload = int.from_bytes(view[start + MESSAGE_HEADER.size:start + hdrlen], byteorder='big')
+
+        packages = []
+        position = start + hdrlen
+        message_end = start + msglen
+        while position + PACKAGE_HEADER.size <= message_end:
+            package_id, package_length, _, package_status_flags, package_time_delta = \
+                PACKAGE_HEADER.unpack_from(view, position)
+            if (package_length < PACKAGE_HEADER.size) or (position + package_length > message_end):
+                break
 
-        return bytes_input
+            package = TmnsPackage(pdid=package_id, length=package_length,
+                                  status_flags=package_status_flags, time_delta=package_time_delta,
+                                  payload=view[position + PACKAGE_HEADER.size:position + package_length])
+            packages.append(package)
+            position = position + package_length
+
+        message = TmnsDataMessage(version=ver, adf_words=adf_words,
+                                  flags=flags, mdid=mdid,
+                                  sequence_number=seqno, length=msglen,
+                                  secs=secs, nanosecs=nanosecs,
+                                  adf_payload=adf_payload, packages=packages)
+
+        return message
+
+    def _fill(self, byte_count: int):
+        # Makes byte_count bytes from pos available in view; False at the end of the stream
+        if self.end - self.pos >= byte_count:
+            return True
+        if self.map is not None:
+            return False
+
+        # Move the unread bytes to the front of the buffer (or a larger one, for a message that doesn't fit), and
+        # read after them
+        left = self.end - self.pos
+        if byte_count > len(self.buffer):
+            buffer = bytearray(max(byte_count, 2 * len(self.buffer)))
+            buffer[:left] = self.view[self.pos:self.end]
+            self.buffer = buffer
+            self.view = memoryview(buffer)
+        else:
+            self.view[:left] = self.view[self.pos:self.end]
+        self.pos = 0
+        self.end = left
+
+        # readinto1() returns what is available, rather than blocking until the whole buffer is filled, so a message
+        # from a live pipe is handled as soon as all of it has arrived
+        readinto = getattr(self.pcap, 'readinto1', self.pcap.readinto)
+        while self.end < byte_count:
+            if (self.on_wait is not None) and not self._readable():
+                self.on_wait()
+            read = readinto(self.view[self.end:])
+            if not read:
+                return False
+            self.end += read
+        return True
+
+    def _readable(self):
+        # True if the pipe has data to read now (or can't be polled)
+        try:
+            return bool(select.select([self.pcap], [], [], 0)[0])
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            return True
+
+
+def iter_messages(pcap, on_wait=None):
+    """Yields the TmNS Data Messages of a binary file or pipe of TDMs (a path, or an open binary file) one at a
+    time, so memory use does not grow with the size of the input.  on_wait is passed to TmnsPcapReader."""
+    if isinstance(pcap, (str, bytes, os.PathLike)):
+        with open(pcap, 'rb') as f:
+            yield from TmnsPcapReader(f, on_wait=on_wait).iter_messages()
+    else:
+        yield from TmnsPcapReader(pcap, on_wait=on_wait).iter_messages()
+
+
+def is_mappable(pcap):
+    # True for a non-empty regular file
+    try:
+        status = os.fstat(pcap.fileno())
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+    return stat.S_ISREG(status.st_mode) and (status.st_size > 0)
@@ -17,6 +17,8 @@ import argparse
 from TmNShark.TmNSquid.actions import preprocess_mdl
 from TmNShark.TmNSquid.actions import make_tdm_packet_list
 from TmNShark.TmNSquid.actions import realtime_tdm_stream_to_network_output
+from TmNShark.TmNSquid.actions import bulk_tdm_file_to_csv
+from TmNShark.TmNSquid.tmns_measurement_store import OUTPUT_FORMATS
 
 
 def main():
@@ -28,6 +30,11 @@ def main():
 
     # optional
     parser.add_argument("-p", "--pipe", dest="is_pipe", help="Pipe or binary file.")
+    parser.add_argument("-b", "--bulk", dest="bulk", action="store_true", default=False,
+                        help="Decode a binary file in batches of same-PDID packages with NumPy.")
+    parser.add_argument("-f", "--format", dest="output_format", choices=OUTPUT_FORMATS, default="csv",
+                        help="Output format of the measurements: CSV files, or a columnar measurement store of "
+                             "chunked .npy, Arrow IPC or Parquet files (default: csv).")
 
     args = parser.parse_args()
 
@@ -35,23 +42,13 @@ def main():
 
     package_decoders = preprocess_mdl(args.mdl)
     # make_tdm_packet_list(args.input, package_decoders)
-    if args.is_pipe:  # it's a pipe
+    if args.bulk:  # a binary file, decoded in batches
+        bulk_tdm_file_to_csv(args.input, package_decoders, args.output_format)
+    elif args.is_pipe:  # it's a pipe
         while True:
-            realtime_tdm_stream_to_network_output(args.input, package_decoders)
+            realtime_tdm_stream_to_network_output(args.input, package_decoders, args.output_format)
     else:  # it's a binary file
-        realtime_tdm_stream_to_network_output(args.input, package_decoders)
-
-
-# Test whether it's faster to read in a lot of bits at once, or a lot of small chunks.
-def test():
-    f = open("./noise", "rb")
-    for i in range(100):
-        f.read(1)
-
-
-def test2():
-    f = open("./noise", "rb")
-    f.read(100)
+        realtime_tdm_stream_to_network_output(args.input, package_decoders, args.output_format)
 
 
 if __name__ == "__main__":
@@ -40,8 +40,9 @@ class TmnsDataMessage:
     """Class to contain TmNS Data Message Structures"""
 
     def __init__(self, ver=1, adf_words=0, flags=0, mdid=0, seqno=0, msglen=24, secs=0, nanosecs=0, adf_payload=None,
-                 payload=None):
+                 payload=None, rsvd=0):
         self.ver = ver
+        self.rsvd = rsvd
         self.adf_words = adf_words
         self.flags = flags
         self.mdid = mdid
@@ -53,9 +54,8 @@ class TmnsDataMessage:
         self.payload = payload
 
     def get_raw(self):
-        rsvd = 0
         raw_ver_adf = ((self.ver << 4) | self.adf_words).to_bytes(1, byteorder='big', signed=False)
-        raw_rsvd = rsvd.to_bytes(1, byteorder='big', signed=False)
+        raw_rsvd = self.rsvd.to_bytes(1, byteorder='big', signed=False)
         raw_flags = self.flags.to_bytes(2, byteorder='big', signed=False)
         raw_mdid = self.mdid.to_bytes(4, byteorder='big', signed=False)
         raw_seqno = self.seqno.to_bytes(4, byteorder='big', signed=False)
@@ -64,7 +64,7 @@ class TmnsDataMessage:
         raw_nanosec = self.time_nanosec.to_bytes(4, byteorder='big', signed=False)
 
         raw = b"".join([raw_ver_adf, raw_rsvd, raw_flags, raw_mdid, raw_seqno,
-                        raw_msglen, raw_sec, raw_nanosec, self.payload])
+                        raw_msglen, raw_sec, raw_nanosec, self.adf_payload or b"", self.payload])
         return raw
 
 
@@ -130,46 +130,78 @@ def write_tdm_to_file(pkt):
 # ------------------------------------------------------------------------------
 
 
+def iter_tdms(f):
+    """ This generator reads TmNS Data Messages from a binary file object (f) of TDMs, which can
+        be a regular file or a pipe, and yields each TDM as soon as it is completely read.  Only
+        one TDM is held in memory at a time.  It stops at the end of the stream (or at a TDM that
+        is cut short by it)."""
+
+    while True:
+        header = f.read(24)
+        if len(header) < 24:
+            return
+        ver = header[0] >> 4
+        adf_words = header[0] & 0x0f
+        rsvd = header[1]  # RESERVED
+        flags = int.from_bytes(header[2:4], byteorder='big')
+        mdid = int.from_bytes(header[4:8], byteorder='big')
+        seqno = int.from_bytes(header[8:12], byteorder='big')
+        msglen = int.from_bytes(header[12:16], byteorder='big')
+        secs = int.from_bytes(header[16:20], byteorder='big')
+        nanosecs = int.from_bytes(header[20:24], byteorder='big')
+        hdrlen = 24 + (adf_words * 4)
+        if msglen < hdrlen:
+            return
+        adf_payload = f.read(adf_words * 4)
+        payload = f.read(msglen - hdrlen)
+        if (len(adf_payload) < (adf_words * 4)) or (len(payload) < (msglen - hdrlen)):
+            return
+
+        yield TmnsDataMessage(ver=ver, adf_words=adf_words, flags=flags, mdid=mdid, seqno=seqno, msglen=msglen,
+                              secs=secs, nanosecs=nanosecs, adf_payload=adf_payload, payload=payload, rsvd=rsvd)
+
+
+# ------------------------------------------------------------------------------
+
+
 def make_tdm_packet_list(bfile):
     """ This function reads a binary file (bfile) of TmNS Data Messages, parses the
         TDMs, and adds each TDM to the list of TDMs (tdm_list).
-        It returns the TDM list."""
+        It returns the TDM list.  Use iter_tdms to process a large file without holding
+        all of its TDMs in memory."""
 
     tdm_list = []
 
     if os.path.exists(bfile):
         with open(bfile, mode='rb') as f:
-            num_bytes = os.path.getsize(bfile)
-            while f.tell() < num_bytes:
-                ver_adf = f.read(1)
-                ver = int.from_bytes(ver_adf, byteorder='big') >> 4
-                adf_words = int.from_bytes(ver_adf, byteorder='big') & 0x0f
-                f.read(1)  # Read byte.  Field is RESERVED
-                flags = int.from_bytes(f.read(2), byteorder='big')
-                mdid = int.from_bytes(f.read(4), byteorder='big')
-                seqno = int.from_bytes(f.read(4), byteorder='big')
-                msglen = int.from_bytes(f.read(4), byteorder='big')
-                secs = int.from_bytes(f.read(4), byteorder='big')
-                nanosecs = int.from_bytes(f.read(4), byteorder='big')
-                hdrlen = 24 + (adf_words * 4)
-                adf_payload = ''
-                if adf_words > 0:
-                    adf_payload = f.read(adf_words * 4)
-                payloadlen = msglen - hdrlen
-                payload = f.read(payloadlen)
-
-                new_msg = TmnsDataMessage(ver=ver, flags=flags, mdid=mdid, seqno=seqno, msglen=msglen, secs=secs,
-                                          nanosecs=nanosecs, adf_payload=adf_payload, payload=payload)
-                tdm_list.append(new_msg)
+            tdm_list.extend(iter_tdms(f))
         return tdm_list
     else:
-        print("The file '{0}' was not found.".format(bin))
+        print("The file '{0}' was not found.".format(bfile))
         return tdm_list
 
 
 # ------------------------------------------------------------------------------
 
 
+def tdm_to_packet(tdm, mdid_list):
+    """ This function builds the IP packet for a TDM.  The destination IP address and the
+        destination UDP port are set according to the TDM's MDID and the associated MDID
+        within the mdid_list."""
+
+    if tdm.mdid in mdid_list:
+        ip_addr = mdid_list[tdm.mdid].dst_addr
+        dport = mdid_list[tdm.mdid].dst_port
+    else:
+        ip_addr = '239.88.88.88'  # Default IP address to use IF MDID is not found in the MDL file
+        dport = 50003  # Default UDP destination port to use IF MDID is not found in the MDL file
+    msg_ip_hdr = IP(version=4, ihl=5, flags='DF', ttl=4, dst=ip_addr)
+    return msg_ip_hdr / UDP(sport=55501, dport=dport) / Raw(tdm.get_raw())
+
+
+# ------------------------------------------------------------------------------
+
+
 def live_network_input_to_pipe(iface=None, p=None):
     """ This function opens a pipe for writing in binary mode, and then it calls
         scapy's 'sniff' function with a callback to write_tdm_to_pipe function.  If
@@ -327,32 +359,14 @@ def realtime_tdm_stream_to_network_output(p=None, mdid_list=None):
     print("Connected to Named Pipe '{0}'.  Reading binary TDMs from pipe.".format(p))
 
     try:
-        while True:
-            raw_ver_adf_flags = pipeout.read(4)
-            raw_mdid = pipeout.read(4)
-            mdid = int.from_bytes(raw_mdid, byteorder='big')
-            raw_seqno = pipeout.read(4)
-            raw_msglen = pipeout.read(4)
-            msglen = int.from_bytes(raw_msglen, byteorder='big')
-            len_remaining = msglen - 16
-            raw_rest_of_tdm = pipeout.read(len_remaining)
-
-            raw = b"".join([raw_ver_adf_flags, raw_mdid, raw_seqno, raw_msglen, raw_rest_of_tdm])
-
-            if mdid in mdid_list:
-                ip_addr = mdid_list[mdid].dst_addr
-                dport = mdid_list[mdid].dst_port
-            else:
-                ip_addr = '239.88.88.88'  # Default IP address to use IF MDID is not found in the MDL file
-                dport = 50003  # Default UDP destination port to use IF MDID is not found in the MDL file
-
-            msg_ip_hdr = IP(version=4, ihl=5, flags='DF', ttl=4, dst=ip_addr)
-            msg = msg_ip_hdr / UDP(sport=55501, dport=dport) / Raw(raw)
+        for tdm in iter_tdms(pipeout):
+            msg = tdm_to_packet(tdm, mdid_list)
 
             send(msg, verbose=0)
 
             tdm_cnt += 1
             print("\rTDM Count: {0}.    CTRL-C to quit".format(tdm_cnt), end=" ")
+        pipeout.close()
 
     except IOError as e:
         if e.errno == errno.EPIPE:
@@ -389,32 +403,14 @@ def realtime_tdm_stream_to_pcap_output(p=None, mdid_list=None, pcap=None):
     print("Connected to Named Pipe '{0}'.  Reading binary TDMs from pipe.".format(p))
 
     try:
-        while True:
-            raw_ver_adf_flags = pipeout.read(4)
-            raw_mdid = pipeout.read(4)
-            mdid = int.from_bytes(raw_mdid, byteorder='big')
-            raw_seqno = pipeout.read(4)
-            raw_msglen = pipeout.read(4)
-            msglen = int.from_bytes(raw_msglen, byteorder='big')
-            len_remaining = msglen - 16
-            raw_rest_of_tdm = pipeout.read(len_remaining)
-
-            raw = b"".join([raw_ver_adf_flags, raw_mdid, raw_seqno, raw_msglen, raw_rest_of_tdm])
-
-            if mdid in mdid_list:
-                ip_addr = mdid_list[mdid].dst_addr
-                dport = mdid_list[mdid].dst_port
-            else:
-                ip_addr = '239.88.88.88'  # Default IP address to use IF MDID is not found in the MDL file
-                dport = 50003  # Default UDP destination port to use IF MDID is not found in the MDL file
-
-            msg_ip_hdr = IP(version=4, ihl=5, flags='DF', ttl=4, dst=ip_addr)
-            msg = msg_ip_hdr / UDP(sport=55501, dport=dport) / Raw(raw)
+        for tdm in iter_tdms(pipeout):
+            msg = tdm_to_packet(tdm, mdid_list)
 
             wrpcap(pcap, msg, append=True)
 
             tdm_cnt += 1
             print("\rTDM Count: {0}.    CTRL-C to quit".format(tdm_cnt), end=" ")
+        pipeout.close()
 
     except IOError as e:
         if e.errno == errno.EPIPE:
@@ -435,27 +431,25 @@ def replay_tdm_stream_to_network_output(bfile=None, mdid_list=None):
     """ This function reads a binary file of TmNS Data Messages, builds an IP packet for
         the TDM, and then sends the packet out of a network interface.  The destination
         IP address and the destination UDP port are set according to the TDM's MDID and
-        the associated MDID within the mdid_list.  The function has 2 input arguments:
+        the associated MDID within the mdid_list.  TDMs are read and sent one at a time over
+        one socket.  The function has 2 input arguments:
         bfile = the name of the binary file to open and read from
         mdid_list - a list of MessageDefinition objects"""
 
-    tdm_list = make_tdm_packet_list(bfile)
-    tdm_cnt = len(tdm_list)
-    pkt_list = []
-
-    for i, tdm in enumerate(tdm_list):
-        if tdm.mdid in mdid_list:
-            ip_addr = mdid_list[tdm.mdid].dst_addr
-            dport = mdid_list[tdm.mdid].dst_port
-        else:
-            ip_addr = '239.88.88.88'  # Default IP address to use IF MDID is not found in the MDL file
-            dport = 50003  # Default UDP destination port to use IF MDID is not found in the MDL file
-        msg_ip_hdr = IP(version=4, ihl=5, flags='DF', ttl=4, dst=ip_addr)
-        msg = msg_ip_hdr / UDP(sport=55501, dport=dport) / Raw(tdm.get_raw())
+    if os.path.exists(bfile) is False:
+        print("The file '{0}' was not found.".format(bfile))
+        return
 
-        pkt_list.append(msg)
+    tdm_cnt = 0
+    sock = conf.L3socket()
+    try:
+        with open(bfile, mode='rb') as f:
+            for tdm in iter_tdms(f):
+                sock.send(tdm_to_packet(tdm, mdid_list))
+                tdm_cnt += 1
+    finally:
+        sock.close()
 
-    send(pkt_list, verbose=0)
     print("Sent {0} TDMs out the network.".format(tdm_cnt))
 
 
@@ -466,29 +460,26 @@ def replay_tdm_stream_to_pcap_output(bfile=None, mdid_list=None, pcap=None):
     """ This function reads a binary file of TmNS Data Messages, builds an IP packet for
         the TDM, and then writes the packet to a PCAP/PCAPNG file for offline analysis.
         The destination IP address and the destination UDP port are set according
-        to the TDM's MDID and the associated MDID within the mdid_list.  The function has 3
-        input arguments:
+        to the TDM's MDID and the associated MDID within the mdid_list.  TDMs are read and
+        written one at a time.  The function has 3 input arguments:
         bfile = the name of the binary file to open and read from
         mdid_list - a list of MessageDefinition objects
         pcap = the name of the PCAP/PCAPNG file to write packets out to."""
 
-    tdm_list = make_tdm_packet_list(bfile)
-    tdm_cnt = len(tdm_list)
-    pkt_list = []
-
-    for i, tdm in enumerate(tdm_list):
-        if tdm.mdid in mdid_list:
-            ip_addr = mdid_list[tdm.mdid].dst_addr
-            dport = mdid_list[tdm.mdid].dst_port
-        else:
-            ip_addr = '239.88.88.88'  # Default IP address to use IF MDID is not found in the MDL file
-            dport = 50003  # Default UDP destination port to use IF MDID is not found in the MDL file
-        msg_ip_hdr = IP(version=4, ihl=5, flags='DF', ttl=4, dst=ip_addr)
-        msg = msg_ip_hdr / UDP(sport=55501, dport=dport) / Raw(tdm.get_raw())
+    if os.path.exists(bfile) is False:
+        print("The file '{0}' was not found.".format(bfile))
+        return
 
-        pkt_list.append(msg)
+    tdm_cnt = 0
+    writer = PcapWriter(pcap, append=True)
+    try:
+        with open(bfile, mode='rb') as f:
+            for tdm in iter_tdms(f):
+                writer.write(tdm_to_packet(tdm, mdid_list))
+                tdm_cnt += 1
+    finally:
+        writer.close()
 
-    wrpcap(pcap, pkt_list, append=True)
     print("Wrote {0} TDMs to the PCAP file: {1}".format(tdm_cnt, pcap))
 
 